@@ -0,0 +1,206 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Historical backfill of G1 news sharded in parallel date windows
+"""
+
+import time
+import argparse
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from crawl_state import CrawlInterrupted
+from crawlers_common import AsyncFetcher
+from crawlers_common import BulkWriter
+from crawlers_common import CrawlPipeline
+from crawlers_common import ensure_indexes
+from crawlers_common import mongo_collection
+from crawler_G1 import DEFAULT_SUBJECT
+from crawler_G1 import MAX_PAGES
+from crawler_G1 import scrap_news_G1
+from crawler_G1 import uri_news_G1
+
+DEFAULT_WORKERS = 8
+DEFAULT_MIN_WINDOW = timedelta(minutes=15)
+
+class WindowTracker:
+    """Progress of backfill windows, stored in the crawl_windows collection
+
+    Every window is a document with status pending, done or split. A window whose
+    search hit the MAX_PAGES cap is split in two halves, which become pending
+    windows, so reruns pick up exactly the windows that are not complete yet.
+
+    Args:
+        subject (string): Term used for querying news
+        collection (pymongo.collection.Collection): Collection of windows (default: crawl_windows)
+    """
+
+    def __init__(self, subject, collection=None):
+        self.subject = subject
+        self.collection = collection if collection is not None else mongo_collection('crawl_windows')
+
+    def plan(self, since, until):
+        """Registers one pending window per day of range (existing windows are kept)
+
+        Args:
+            since (datetime.datetime): First day of range
+            until (datetime.datetime): Last day of range
+
+        Returns:
+            list of tuple: (start, end) of every pending window of range
+        """
+
+        day = datetime(since.year, since.month, since.day)
+        while day <= until:
+            self._register(day, day + timedelta(days=1), 'pending', update=False)
+            day += timedelta(days=1)
+        pending = self.collection.find({'source': 'G1', 'subject': self.subject, 'status': 'pending',
+                                        'start': {'$gte': datetime(since.year, since.month, since.day),
+                                                  '$lte': until}})
+        return sorted((w['start'], w['end']) for w in pending)
+
+    def done(self, start, end, pages, capped):
+        """Marks a window as complete
+
+        Args:
+            start (datetime.datetime): Start of window
+            end (datetime.datetime): End of window (exclusive)
+            pages (int): Number of pages with news
+            capped (bool): True if the window hit the MAX_PAGES cap
+
+        Returns:
+            Nothing
+        """
+
+        self._register(start, end, 'done', pages=pages, capped=capped)
+
+    def split(self, start, end):
+        """Replaces a window by its two pending halves
+
+        Args:
+            start (datetime.datetime): Start of window
+            end (datetime.datetime): End of window (exclusive)
+
+        Returns:
+            list of tuple: (start, end) of halves
+        """
+
+        middle = start + (end - start) / 2
+        middle -= timedelta(microseconds=middle.microsecond) + timedelta(seconds=middle.second)
+        halves = [(start, middle), (middle, end)]
+        for half_start, half_end in halves:
+            self._register(half_start, half_end, 'pending', update=False)
+        self._register(start, end, 'split')
+        return halves
+
+    def _register(self, start, end, status, update=True, **fields):
+        key = f'G1:{self.subject}:{start.isoformat()}:{end.isoformat()}'
+        document = {'source': 'G1', 'subject': self.subject, 'start': start, 'end': end}
+        if update:
+            self.collection.update_one({'_id': key}, {'$set': dict(document, status=status, **fields)},
+                                       upsert=True)
+        else:
+            self.collection.update_one({'_id': key}, {'$setOnInsert': dict(document, status=status)},
+                                       upsert=True)
+
+def crawl_window(pipeline, writer, subject, start, end):
+    """Crawls all search pages of a time window of G1 news
+
+    Args:
+        pipeline (crawlers_common.CrawlPipeline): Fetch and parse stages of crawl
+        writer (crawlers_common.BulkWriter): Bulk writer of raw_G1 collection
+        subject (string): Term used for querying news
+        start (datetime.datetime): Start of window
+        end (datetime.datetime): End of window (exclusive)
+
+    Returns:
+        tuple: (number of pages with news, True if the window hit the MAX_PAGES cap)
+    """
+
+    last = end - timedelta(seconds=1)
+    uris = [uri_news_G1(subject, start.strftime('%Y-%m-%d'), start.strftime('%H:%M:%S'),
+                        last.strftime('%Y-%m-%d'), last.strftime('%H:%M:%S'), page)
+            for page in range(1, MAX_PAGES + 1)]
+    pages = 0
+    for news_scrapped in pipeline.scrap(uris, scrap_news_G1, 'Failed to get HTML'):
+        if news_scrapped is None:
+            raise CrawlInterrupted(f'Failed to get page {pages + 1} of window {start} - {end}')
+        if not news_scrapped:
+            break
+        pages += 1
+        for news in news_scrapped:
+            writer.add(news)
+    writer.flush()
+    return pages, pages == MAX_PAGES
+
+def run_window(fetcher, executor, writer, tracker, start, end, min_window):
+    """Crawls a window and records its progress, splitting it if it hit the pages cap
+
+    Args:
+        fetcher (crawlers_common.AsyncFetcher): Fetch engine shared by all windows
+        executor (concurrent.futures.Executor): Parsing pool shared by all windows
+        writer (crawlers_common.BulkWriter): Bulk writer of raw_G1 collection
+        tracker (WindowTracker): Progress of backfill windows
+        start (datetime.datetime): Start of window
+        end (datetime.datetime): End of window (exclusive)
+        min_window (datetime.timedelta): Windows of this size are not split anymore
+
+    Returns:
+        list of tuple: (start, end) of windows that must still be crawled
+    """
+
+    pipeline = CrawlPipeline(fetcher, executor=executor)
+    try:
+        pages, capped = crawl_window(pipeline, writer, tracker.subject, start, end)
+    finally:
+        pipeline.close()
+    if capped and end - start > min_window:
+        print(f'Window {start} - {end} hit the {MAX_PAGES} pages cap, splitting it')
+        return tracker.split(start, end)
+    if capped:
+        print(f'Window {start} - {end} hit the {MAX_PAGES} pages cap at minimum size, news may be missing')
+    tracker.done(start, end, pages, capped)
+    return []
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backfills G1 news of a date range in parallel windows')
+    parser.add_argument('--since', type=datetime.fromisoformat, required=True, help='First day of range')
+    parser.add_argument('--until', type=datetime.fromisoformat, default=datetime.now(), help='Last day of range')
+    parser.add_argument('--subject', default=DEFAULT_SUBJECT, help='Term used for querying news')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Windows crawled at the same time')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_WORKERS, help='Simultaneous requests to G1')
+    parser.add_argument('--rate', type=float, help='Maximum requests per second to G1')
+    parser.add_argument('--min-window-minutes', type=int, default=DEFAULT_MIN_WINDOW.seconds // 60,
+                        help='Windows hitting the pages cap are split down to this size')
+    args = parser.parse_args()
+
+    collection = mongo_collection('raw_G1')
+    ensure_indexes(collection)
+    tracker = WindowTracker(args.subject)
+    min_window = timedelta(minutes=args.min_window_minutes)
+    windows = tracker.plan(args.since, args.until)
+    print(f'{len(windows)} pending windows between {args.since:%Y-%m-%d} and {args.until:%Y-%m-%d}')
+
+    start_time = time.perf_counter()
+    completed = interrupted = 0
+    with AsyncFetcher(args.concurrency, args.rate) as fetcher, ProcessPoolExecutor() as executor, \
+         BulkWriter(collection) as writer, ThreadPoolExecutor(max_workers=args.workers) as threads:
+        running = {threads.submit(run_window, fetcher, executor, writer, tracker, s, e, min_window): (s, e)
+                   for s, e in windows}
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                running.pop(future)
+                try:
+                    remaining = future.result()
+                except CrawlInterrupted as error:
+                    print(f'{error}, it stays pending for the next run')
+                    interrupted += 1
+                    continue
+                completed += not remaining
+                for s, e in remaining:
+                    running[threads.submit(run_window, fetcher, executor, writer, tracker, s, e, min_window)] = (s, e)
+
+    print(f'{completed} windows complete, {interrupted} interrupted, {writer.totals.inserted} news inserted, '
+          f'{writer.totals.duplicates} duplicates in {time.perf_counter() - start_time:.1f}s')
+    print('Execution finished')
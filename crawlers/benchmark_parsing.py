@@ -0,0 +1,78 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Benchmark of HTML parsing backends of scrap functions over cached pages
+"""
+
+import time
+import argparse
+import crawlers_common
+from response_cache import ResponseCache
+from crawler_Estadao import ENDPOINT as ESTADAO_ENDPOINT, scrap_news_Estadao
+from crawler_FatoFake import scrap_fake_news_FatoFake
+from crawler_G1 import ENDPOINT as G1_ENDPOINT, scrap_news_G1
+from crawler_MinisterioFake import ENDPOINT as MINISTERIO_ENDPOINT, scrap_fake_news_Ministerio
+from crawler_UOL import ENDPOINT as UOL_ENDPOINT, scrap_news_UOL
+
+SOURCES = {'G1': (G1_ENDPOINT, scrap_news_G1),
+           'UOL': (UOL_ENDPOINT, scrap_news_UOL),
+           'Estadao': (ESTADAO_ENDPOINT, scrap_news_Estadao),
+           'FatoFake': ('https://g1.globo.com/fato-ou-fake/', scrap_fake_news_FatoFake),
+           'MinisterioFake': (MINISTERIO_ENDPOINT, scrap_fake_news_Ministerio)}
+
+def available_backends():
+    """Gets the combinations of parser and strainer that can run in this environment
+
+    Returns:
+        list of tuple: (parser name, strain) pairs, the original full html.parser tree first
+    """
+
+    backends = [('html.parser', False), ('html.parser', True)]
+    if crawlers_common.DEFAULT_HTML_PARSER == 'lxml':
+        backends += [('lxml', False), ('lxml', True)]
+    return backends
+
+def benchmark(scrap, pages, parser, strain, repeat):
+    """Times a scrap function over pages with one parsing backend
+
+    Args:
+        scrap (function): Scrap function of source
+        pages (list of string): HTML of query pages
+        parser (string): BeautifulSoup parser name
+        strain (bool): If True, parses only the news containers
+        repeat (int): Number of passes over pages
+
+    Returns:
+        tuple: (seconds per page, titles and links scraped from pages)
+    """
+
+    crawlers_common.HTML_PARSER = parser
+    crawlers_common.STRAIN_HTML = strain
+    start = time.perf_counter()
+    for _ in range(repeat):
+        scraped = [[(n['title'], n['link']) for n in scrap(html)] for html in pages]
+    return (time.perf_counter() - start) / (repeat * len(pages)), scraped
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks parsing backends over cached pages')
+    parser.add_argument('cache', help='Directory of response cache holding crawled pages')
+    parser.add_argument('--sources', nargs='*', default=list(SOURCES), choices=list(SOURCES))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.cache, offline=True)
+    for source in args.sources:
+        prefix, scrap = SOURCES[source]
+        pages = [html for _, html in cache.items(prefix)]
+        if not pages:
+            print(f'{source}: no cached pages')
+            continue
+        baseline, expected = None, None
+        for name, strain in available_backends():
+            seconds, scraped = benchmark(scrap, pages, name, strain, args.repeat)
+            baseline = baseline or seconds
+            expected = expected or scraped
+            print(f'{source} ({len(pages)} pages) {name:<11} strain={str(strain):<5} '
+                  f'{seconds*1000:8.2f} ms/page  speedup {baseline/seconds:5.2f}x  '
+                  f'same output: {scraped == expected}')
@@ -0,0 +1,195 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Single entry point that runs several crawlers in parallel
+"""
+
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from crawl_state import CrawlInterrupted
+from crawlers_common import AsyncFetcher
+from crawlers_common import BatchReport
+from crawlers_common import CrawlPipeline
+from crawlers_common import DEFAULT_CONCURRENCY_PER_HOST
+from crawler_CNN import crawl_CNN
+from crawler_Estadao import crawl_Estadao
+from crawler_FatoFake import crawl_FatoFake
+from crawler_G1 import crawl_G1
+from crawler_MinisterioFake import crawl_MinisterioFake
+from crawler_UOL import crawl_UOL
+
+# Source name: (crawl function, queries subject terms, accepts date range, host)
+SOURCES = {'G1': (crawl_G1, True, True, 'g1.globo.com'),
+           'CNN': (crawl_CNN, True, True, 'api.cnnbrasil.com.br'),
+           'UOL': (crawl_UOL, False, True, 'noticias.uol.com.br'),
+           'Estadao': (crawl_Estadao, False, True, 'saude.estadao.com.br'),
+           'FatoFake': (crawl_FatoFake, False, True, 'g1.globo.com'),
+           'MinisterioFake': (crawl_MinisterioFake, False, False, 'antigo.saude.gov.br')}
+
+def parse_budgets(values, cast):
+    """Parses budget options given as VALUE (all sources) or SOURCE=VALUE
+
+    Args:
+        values (list of string): Values of option
+        cast (function): Converts value to its type
+
+    Returns:
+        tuple: (default value | None, dictionary of value by source)
+    """
+
+    default, budgets = None, {}
+    for value in values or []:
+        if '=' in value:
+            source, value = value.split('=', 1)
+            budgets[source] = cast(value)
+        else:
+            default = cast(value)
+    return default, budgets
+
+def host_limits(sources, default_concurrency, concurrency, default_rate, rate):
+    """Gets the concurrency and rate limits of the host of each source
+
+    Sources on the same host (e.g. G1 and FatoFake) share its limits, which are the
+    strictest of their budgets.
+
+    Args:
+        sources (list of string): Names of sources in SOURCES
+        default_concurrency (int): Simultaneous requests of sources without their own budget
+        concurrency (dictionary): Simultaneous requests by source
+        default_rate (float): Requests per second of sources without their own budget | None
+        rate (dictionary): Requests per second by source
+
+    Returns:
+        dictionary: (concurrency, requests per second | None) by host
+    """
+
+    limits = {}
+    for source in sources:
+        host = SOURCES[source][3]
+        source_concurrency = concurrency.get(source, default_concurrency)
+        source_rate = rate.get(source, default_rate)
+        if host in limits:
+            host_concurrency, host_rate = limits[host]
+            source_concurrency = min(source_concurrency, host_concurrency)
+            source_rate = min(r for r in [source_rate, host_rate] if r) if source_rate or host_rate else None
+        limits[host] = (source_concurrency, source_rate)
+    return limits
+
+def run_source(source, subjects, since, until, fetcher, executor):
+    """Crawls one source for every subject
+
+    Args:
+        source (string): Name of source in SOURCES
+        subjects (list of string): Terms used for querying news (if source supports them)
+        since (datetime.datetime): Oldest news datetime to crawl | None for checkpoint
+        until (datetime.datetime): Most recent news datetime to crawl | None
+        fetcher (crawlers_common.AsyncFetcher): Fetch engine shared by all sources, with their host limits
+        executor (concurrent.futures.Executor): Parsing pool shared by all sources
+
+    Returns:
+        dictionary: Status, pages, write counts and elapsed seconds of crawl
+    """
+
+    crawl, takes_subject, takes_range, _ = SOURCES[source]
+    kwargs = {'since': since, 'until': until} if takes_range else {}
+    totals, status = BatchReport(0, 0, 0), 'finished'
+    start = time.perf_counter()
+    pipeline = CrawlPipeline(fetcher, executor=executor)
+    try:
+        for subject in (subjects if takes_subject else [None]):
+            report = crawl(pipeline, subject, **kwargs) if subject else crawl(pipeline, **kwargs)
+            totals = BatchReport(*[t + r for t, r in zip(totals, report)])
+    except CrawlInterrupted as error:
+        status = f'interrupted: {error}'
+    except Exception as error:
+        status = f'failed: {error!r}'
+    pipeline.close()
+    return {'source': source, 'status': status, 'pages': pipeline.pages,
+            'totals': totals, 'seconds': time.perf_counter() - start}
+
+def print_summary(results, seconds):
+    """Prints pages, writes and throughput of each source and of the whole crawl
+
+    Args:
+        results (list of dictionary): Results of run_source
+        seconds (float): Wall-clock seconds of the whole crawl
+
+    Returns:
+        Nothing
+    """
+
+    print(f'{"source":<15}{"pages":>8}{"inserted":>10}{"dupl.":>8}{"failed":>8}'
+          f'{"seconds":>10}{"pages/s":>9}{"news/s":>9}  status')
+    for r in results + [{'source': 'TOTAL', 'status': '', 'seconds': seconds,
+                         'pages': sum(r['pages'] for r in results),
+                         'totals': BatchReport(*[sum(c) for c in zip(*[r['totals'] for r in results])])}]:
+        news = sum(r['totals'])
+        elapsed = max(r['seconds'], 1e-9)
+        print(f'{r["source"]:<15}{r["pages"]:>8}{r["totals"].inserted:>10}{r["totals"].duplicates:>8}'
+              f'{r["totals"].failed:>8}{r["seconds"]:>10.1f}{r["pages"]/elapsed:>9.2f}{news/elapsed:>9.1f}  {r["status"]}')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs crawlers of several sources in parallel')
+    parser.add_argument('sources', nargs='*', metavar='SOURCE',
+                        help='Sources to crawl among ' + ', '.join(SOURCES) + ' (default: all)')
+    parser.add_argument('--subject', dest='subjects', action='append',
+                        help='Query term of sources with search (repeatable, default: coronavirus)')
+    parser.add_argument('--since', type=datetime.fromisoformat,
+                        help='Oldest news datetime (default: resume from checkpoints)')
+    parser.add_argument('--until', type=datetime.fromisoformat, help='Most recent news datetime')
+    parser.add_argument('--concurrency', action='append', metavar='[SOURCE=]N',
+                        help='Simultaneous requests per source host (repeatable)')
+    parser.add_argument('--rate', action='append', metavar='[SOURCE=]R',
+                        help='Maximum requests per second per source host (repeatable)')
+    parser.add_argument('--parse-workers', type=int, help='Parsing processes (default: number of CPUs)')
+    parser.add_argument('--score', metavar='BUNDLE', help='Scores new news with a model bundle as soon as they are stored')
+    parser.add_argument('--follow', type=float, metavar='SECONDS',
+                        help='Crawls again the new news every SECONDS until interrupted')
+    parser.add_argument('--alert-threshold', type=float, default=0.9, help='Fake news probability that raises alerts')
+    parser.add_argument('--alert-file', help='JSON lines file receiving alerts')
+    parser.add_argument('--alert-collection', help='MongoDB collection receiving alerts (e.g. alerts)')
+    parser.add_argument('--webhook', help='URL receiving alerts as JSON posts')
+    args = parser.parse_args()
+    unknown = set(args.sources) - set(SOURCES)
+    if unknown:
+        parser.error('unknown sources: ' + ', '.join(sorted(unknown)))
+    if (args.alert_file or args.alert_collection or args.webhook) and not args.score:
+        parser.error('alerts need --score')
+    if args.follow is not None and args.since is not None:
+        parser.error('--follow resumes from checkpoints, so it cannot be used with --since')
+    args.sources = args.sources or list(SOURCES)
+
+    default_concurrency, concurrency = parse_budgets(args.concurrency, int)
+    default_rate, rate = parse_budgets(args.rate, float)
+    default_concurrency = default_concurrency or DEFAULT_CONCURRENCY_PER_HOST
+    subjects = args.subjects or ['coronavirus']
+
+    scorer = None
+    if args.score:
+        from stream_scoring import load_scorer   # loads the NLP stack only when scoring
+        scorer = load_scorer(args.score, args.alert_threshold, args.alert_file, args.alert_collection,
+                             args.webhook).start()
+    try:
+        limits = host_limits(args.sources, default_concurrency, concurrency, default_rate, rate)
+        with AsyncFetcher(default_concurrency, default_rate, host_limits=limits) as fetcher, \
+             ProcessPoolExecutor(max_workers=args.parse_workers) as executor, \
+             ThreadPoolExecutor(max_workers=len(args.sources)) as threads:
+            while True:
+                start = time.perf_counter()
+                futures = [threads.submit(run_source, source, subjects, args.since, args.until, fetcher, executor)
+                           for source in args.sources]
+                results = [f.result() for f in futures]
+                print_summary(results, time.perf_counter() - start)
+                if args.follow is None:
+                    break
+                time.sleep(args.follow)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if scorer is not None:
+            scorer.close()
+
+    print('Execution finished')
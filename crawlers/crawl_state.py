@@ -0,0 +1,102 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Persistent crawl checkpoints for resumable and incremental crawling
+"""
+
+from datetime import datetime
+from crawlers_common import mongo_collection
+
+
+class CrawlInterrupted(Exception): pass
+
+class CrawlState:
+    """Checkpoint of one crawl source, stored in the crawl_state collection
+
+    A run begins by reading the checkpoint of its source. If the previous run did not
+    finish (crash or failed request), the new run resumes from its page and cursor
+    with the same stop datetime. Otherwise it starts over from the first page and
+    stops at the high-water mark, the most recent datetime stored by the previous
+    runs, so only the new frontier is fetched.
+
+    A state that does not persist (e.g. for runs over an explicit date range) starts
+    from the first page and never reads or writes the checkpoint.
+
+    Args:
+        source (string): Name of crawl source (e.g. 'G1')
+        collection (pymongo.collection.Collection): Collection of checkpoints (default: crawl_state)
+        persist (bool): If False, the checkpoint is neither loaded nor saved
+    """
+
+    def __init__(self, source, collection=None, persist=True):
+        self.source = source
+        self.persist = persist
+        self.collection = collection if collection is not None else mongo_collection('crawl_state')
+        state = (self.collection.find_one({'_id': source}) if persist else None) or {}
+        self.resuming = state.get('status') == 'running'
+        self.high_water_mark = state.get('high_water_mark')
+        self.page = state.get('page') if self.resuming else None
+        self.cursor = state.get('cursor') if self.resuming else None
+        self.newest = state.get('newest') if self.resuming else None
+        self.stop_at = state.get('stop_at') if self.resuming else self.high_water_mark
+
+    def begin(self, default_stop_at=None):
+        """Marks the run as started and gets the datetime where crawling stops
+
+        Args:
+            default_stop_at (function): Returns the stop datetime when source has no checkpoint yet
+
+        Returns:
+            datetime.datetime: News older than this datetime were already stored | None
+        """
+
+        if self.stop_at is None and default_stop_at is not None:
+            self.stop_at = default_stop_at()
+        if self.resuming:
+            print(f'Resuming {self.source} crawl from page {self.page}, cursor {self.cursor}')
+        self._save({'status': 'running', 'stop_at': self.stop_at, 'page': self.page,
+                    'cursor': self.cursor, 'newest': self.newest})
+        return self.stop_at
+
+    def observe(self, date):
+        """Registers the datetime of a stored news, keeping the most recent one
+
+        Args:
+            date (datetime.datetime): Datetime of news
+
+        Returns:
+            Nothing
+        """
+
+        if self.newest is None or date > self.newest:
+            self.newest = date
+
+    def checkpoint(self, page, cursor=None):
+        """Saves where the run must resume (call only after writes of previous pages are flushed)
+
+        Args:
+            page (int): Next page to fetch
+            cursor (string): Source specific position (e.g. query date)
+
+        Returns:
+            Nothing
+        """
+
+        self.page = page
+        self.cursor = cursor
+        self._save({'page': page, 'cursor': cursor, 'newest': self.newest})
+
+    def finish(self):
+        """Marks the run as finished and moves the high-water mark to the newest stored news"""
+
+        if self.newest is not None and (self.high_water_mark is None or self.newest > self.high_water_mark):
+            self.high_water_mark = self.newest
+        self._save({'status': 'finished', 'high_water_mark': self.high_water_mark,
+                    'page': None, 'cursor': None, 'newest': None})
+
+    def _save(self, fields):
+        if not self.persist:
+            return
+        fields['updated_at'] = datetime.now()
+        self.collection.update_one({'_id': self.source}, {'$set': fields}, upsert=True)
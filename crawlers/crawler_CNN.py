@@ -6,41 +6,53 @@ Description: Crawler to get news from CNN
 """
 
 import json
-from datetime import datetime, timedelta
-from pymongo import MongoClient
-from requests import get
-from urllib.parse import unquote
+from datetime import datetime
+from itertools import count
+from crawl_state import CrawlInterrupted
+from crawl_state import CrawlState
 from crawlers_common import NestedLoopBreaker
-from crawlers_common import get_between
+from crawlers_common import CrawlPipeline
+from crawlers_common import get_text
 from crawlers_common import mongo_collection
-from crawlers_common import insert_raw_collection
+from crawlers_common import ensure_indexes
+from crawlers_common import latest_datetime
+from crawlers_common import OLDEST_DATETIME
+from crawlers_common import BulkWriter
 
 ENDPOINT = 'https://api.cnnbrasil.com.br/110/v1/search/news'
 CHUNK_SIZE = 500
+DEFAULT_SUBJECT = 'coronavirus'
 
-def get_json_news_CNN(subject, page):
-    """Sends GET HTTP request in order to get the JSON from CNN api news service
+def uri_news_CNN(subject, page):
+    """Builds the URI of CNN api news service
   
     Args:
         subject (string): Term used for querying news
         page (int): Number of page for query - depends on CHUNK_SIZE
 
     Returns:
-        string: JSON string of CNN api news service | 'Failed to get JSON' if fails
+        string: URI of CNN api news service query
     """
 
     uri = ENDPOINT                       # set endpoint
     uri += '?term=' + subject            # set query subject
     uri += '&limit=' + str(CHUNK_SIZE)   # set query chunk size
     uri += '&page=' + str(page)          # set query page
+    return uri
+
+def get_json_news_CNN(subject, page):
+    """Sends GET HTTP request in order to get the JSON from CNN api news service
+  
+    Args:
+        subject (string): Term used for querying news
+        page (int): Number of page for query - depends on CHUNK_SIZE
+
+    Returns:
+        string: JSON string of CNN api news service | 'Failed to get JSON' if fails
+    """
 
-    try:
-        print('Getting URI: ' + uri + '\n')
-        response = get(uri)
-        print('Result GET: ' + str(response) + '\n')
-        return response.text
-    except:
-        return 'Failed to get JSON'
+    uri = uri_news_CNN(subject, page)
+    return get_text(uri, 'Failed to get JSON')
 
 def scrap_news_CNN(json_string):
     """Gets headline, date and link of content of news contained in JSON
@@ -63,34 +75,59 @@ def scrap_news_CNN(json_string):
             news.append(news_data)
     return news
 
-if __name__ == '__main__':
+def crawl_CNN(pipeline, subject=DEFAULT_SUBJECT, since=None, until=None):
+    """Crawls CNN news into raw_CNN collection, from the most recent to the already stored ones
+  
+    Args:
+        pipeline (crawlers_common.CrawlPipeline): Fetch and parse stages of crawl
+        subject (string): Term used for querying news
+        since (datetime.datetime): Stops at news older than this datetime (default: checkpoint)
+        until (datetime.datetime): Skips news more recent than this datetime
+
+    Returns:
+        crawlers_common.BatchReport: Counts of inserted, duplicated and failed news
+    """
+
     # Set target collection
-    CNN_COLLECTION = mongo_collection('raw_CNN')
-
-    # Get max datetime in collection (for duplicity control)
-    try:
-        MAX_DATETIME = CNN_COLLECTION.find().sort([("datetime", -1)]).limit(1)[0]['datetime']
-    except:
-        MAX_DATETIME = datetime(1900,1,1,0,0,0)
-
-    # Processing logic
-    page_number = 1
-    try:
-        while (True):
-            json_string = get_json_news_CNN('coronavirus', page_number)
-            news_scrapped = scrap_news_CNN(json_string)
-            if not news_scrapped:
-                break
-            for news in news_scrapped:
-                # If news datetime is older than database registries, stop
-                if news['datetime'] < MAX_DATETIME:
-                    raise NestedLoopBreaker()
-                inserted_id = insert_raw_collection(news, CNN_COLLECTION)
-                print('Inserted object ' + inserted_id + ', dated on ' + 
-                news['datetime'].strftime("%Y-%m-%d") + ' into raw_CNN collection')
-            page_number += 1
-
-    except NestedLoopBreaker:
-        pass
+    collection = mongo_collection('raw_CNN')
+    ensure_indexes(collection)
+
+    # Get checkpoint of last run (stop datetime for duplicity control and page to resume),
+    # runs over an explicit date range do not touch checkpoints
+    ranged = since is not None or until is not None
+    default_subject = subject == DEFAULT_SUBJECT
+    state = CrawlState('CNN' if default_subject else 'CNN:' + subject, persist=not ranged)
+    stored_until = (lambda: latest_datetime(collection)) if default_subject else (lambda: OLDEST_DATETIME)
+    max_datetime = (since or OLDEST_DATETIME) if ranged else state.begin(stored_until)
+    first_page = state.page if state.page is not None else 1
+
+    # Processing logic (next pages are requested and parsed while the current one is stored)
+    uris = (uri_news_CNN(subject, page) for page in count(first_page))
+    with BulkWriter(collection) as writer:
+        try:
+            for page, news_scrapped in enumerate(pipeline.scrap(uris, scrap_news_CNN, 'Failed to get JSON'), first_page):
+                if news_scrapped is None:
+                    raise CrawlInterrupted(f'Failed to get page {page}, next run resumes from it')
+                if not news_scrapped:
+                    break
+                for news in news_scrapped:
+                    # If news datetime is older than database registries, stop
+                    if news['datetime'] < max_datetime:
+                        raise NestedLoopBreaker()
+                    if until is not None and news['datetime'] > until:
+                        continue
+                    writer.add(news)
+                    state.observe(news['datetime'])
+                writer.flush()
+                state.checkpoint(page + 1)
+        except NestedLoopBreaker:
+            pass
+        writer.flush()
+        state.finish()
+    return writer.totals
+
+if __name__ == '__main__':
+    with CrawlPipeline() as pipeline:
+        crawl_CNN(pipeline)
     
-    print('Execution finished')
\ No newline at end of file
+    print('Execution finished')
@@ -5,15 +5,20 @@ Created in: 2021-04-04
 Description: Crawler to get news from Estadao
 """
 
-from bs4 import BeautifulSoup
 from datetime import datetime
-from pymongo import MongoClient
-from requests import get
+from itertools import count
+from crawl_state import CrawlInterrupted
+from crawl_state import CrawlState
+from date_normalizer import normalize_dates
 from crawlers_common import NestedLoopBreaker
-from crawlers_common import get_between
+from crawlers_common import CrawlPipeline
+from crawlers_common import get_text
+from crawlers_common import parse_html
 from crawlers_common import mongo_collection
-from crawlers_common import insert_raw_collection
-from crawlers_common import portuguese_month_replacer
+from crawlers_common import ensure_indexes
+from crawlers_common import latest_datetime
+from crawlers_common import OLDEST_DATETIME
+from crawlers_common import BulkWriter
 
 ENDPOINT = 'https://saude.estadao.com.br/modulos/ultimas'
 MODULO = 'ultimas'
@@ -23,15 +28,16 @@ TIPO_MEDIA = 'Notícias'
 ID_CANAL = 9
 CHUNK_SIZE = 500
 PATH_MODULO = 'portal/saude/modulos/'
+NEWS_CONTAINER = ('section', {'class': 'col-md-12 col-sm-12 col-xs-12 init item-lista'})
 
-def get_html_news_Estadao(page):
-    """Sends GET HTTP request in order to get the HTML of Estadao news query page
+def uri_news_Estadao(page):
+    """Builds the URI of Estadao news query page
   
     Args:
         page (int): Number of page for query - depends on CHUNK_SIZE
 
     Returns:
-        string: HTML of Estadao news query page | 'Failed to get HTML' if fails
+        string: URI of Estadao news query page
     """
 
     uri = ENDPOINT                                      # set endpoint
@@ -43,14 +49,20 @@ def get_html_news_Estadao(page):
     uri += '&config[busca][page]=' + str(page)          # set query page
     uri += '&config[busca][rows]='+ str(CHUNK_SIZE)     # set query chunk size
     uri += '&config[path_modulo]='+ str(PATH_MODULO)    # set module path
+    return uri
+
+def get_html_news_Estadao(page):
+    """Sends GET HTTP request in order to get the HTML of Estadao news query page
+  
+    Args:
+        page (int): Number of page for query - depends on CHUNK_SIZE
+
+    Returns:
+        string: HTML of Estadao news query page | 'Failed to get HTML' if fails
+    """
 
-    try:
-        print('Getting URI: ' + uri + '\n')
-        response = get(uri)
-        print('Result GET: ' + str(response) + '\n')
-        return response.text
-    except:
-        return 'Failed to get HTML'
+    uri = uri_news_Estadao(page)
+    return get_text(uri, 'Failed to get HTML')
 
 def scrap_news_Estadao(html):
     """Gets headline, date and link of content of news contained in HTML
@@ -63,55 +75,78 @@ def scrap_news_Estadao(html):
     """
 
     news = []
+    date_strings = []
     if not (html == 'Failed to get HTML'):
-        page = BeautifulSoup(html, features='html.parser')
-        news_containers = page.find_all('section', {'class': 'col-md-12 col-sm-12 col-xs-12 init item-lista'})
+        page = parse_html(html, *NEWS_CONTAINER)
+        news_containers = page.find_all(*NEWS_CONTAINER)
         for nc in news_containers:
             # Get and treat news date
             date_string = nc.find('span', {'class': 'data-posts'})
             if not date_string:
                 continue
-            date_string = date_string.text.strip()
-            date_string = portuguese_month_replacer(date_string)
-            date = datetime.strptime(date_string, '%d de %m de %Y | %Hh%M')
+            date_strings.append(date_string.text.strip())
             # Get and treat news title
             obj_title = nc.find('a', {'class': 'link-title'})
             title = obj_title['title']
             # Get and treat news link
             link = obj_title['href']
             # Construct object
-            news_data = {'title': title, 'link': link, 'datetime': date}
+            news_data = {'title': title, 'link': link}
             news.append(news_data)
+        for news_data, date in zip(news, normalize_dates(date_strings)):
+            news_data['datetime'] = date
     return news
 
-if __name__ == '__main__':
+def crawl_Estadao(pipeline, since=None, until=None):
+    """Crawls Estadao news into raw_Estadao collection, from the most recent to the already stored ones
+  
+    Args:
+        pipeline (crawlers_common.CrawlPipeline): Fetch and parse stages of crawl
+        since (datetime.datetime): Stops at news older than this datetime (default: checkpoint)
+        until (datetime.datetime): Skips news more recent than this datetime
+
+    Returns:
+        crawlers_common.BatchReport: Counts of inserted, duplicated and failed news
+    """
+
     # Set target collection
-    ESTADAO_COLLECTION = mongo_collection('raw_Estadao')
-
-    # Get max datetime in collection (for duplicity control)
-    try:
-        MAX_DATETIME = ESTADAO_COLLECTION.find().sort([("datetime", -1)]).limit(1)[0]['datetime']
-    except:
-        MAX_DATETIME = datetime(1900,1,1,0,0,0)
-
-    # Processing logic
-    page_number = 1
-    try:
-        while (True):
-            html = get_html_news_Estadao(page_number)
-            news_scrapped = scrap_news_Estadao(html)
-            if not news_scrapped:
-                break
-            for news in news_scrapped:
-                # If news datetime is older than database registries, stop
-                if news['datetime'] < MAX_DATETIME:
-                    raise NestedLoopBreaker()
-                inserted_id = insert_raw_collection(news, ESTADAO_COLLECTION)
-                print('Inserted object ' + inserted_id + ', dated on ' + 
-                news['datetime'].strftime("%Y-%m-%d") + ' into raw_Estadao collection')
-            page_number += 1
-
-    except NestedLoopBreaker:
-        pass
+    collection = mongo_collection('raw_Estadao')
+    ensure_indexes(collection)
+
+    # Get checkpoint of last run (stop datetime for duplicity control and page to resume),
+    # runs over an explicit date range do not touch checkpoints
+    ranged = since is not None or until is not None
+    state = CrawlState('Estadao', persist=not ranged)
+    max_datetime = (since or OLDEST_DATETIME) if ranged else state.begin(lambda: latest_datetime(collection))
+    first_page = state.page if state.page is not None else 1
+
+    # Processing logic (next pages are requested and parsed while the current one is stored)
+    uris = (uri_news_Estadao(page) for page in count(first_page))
+    with BulkWriter(collection) as writer:
+        try:
+            for page, news_scrapped in enumerate(pipeline.scrap(uris, scrap_news_Estadao, 'Failed to get HTML'), first_page):
+                if news_scrapped is None:
+                    raise CrawlInterrupted(f'Failed to get page {page}, next run resumes from it')
+                if not news_scrapped:
+                    break
+                for news in news_scrapped:
+                    # If news datetime is older than database registries, stop
+                    if news['datetime'] < max_datetime:
+                        raise NestedLoopBreaker()
+                    if until is not None and news['datetime'] > until:
+                        continue
+                    writer.add(news)
+                    state.observe(news['datetime'])
+                writer.flush()
+                state.checkpoint(page + 1)
+        except NestedLoopBreaker:
+            pass
+        writer.flush()
+        state.finish()
+    return writer.totals
+
+if __name__ == '__main__':
+    with CrawlPipeline() as pipeline:
+        crawl_Estadao(pipeline)
     
-    print('Execution finished')
\ No newline at end of file
+    print('Execution finished')
@@ -5,14 +5,35 @@ Created in: 2021-04-04
 Description: Crawler to get fake news from G1 Fato ou Fake
 """
 
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
-from pymongo import MongoClient
-from requests import get
+from datetime import datetime
+from itertools import count
+from crawl_state import CrawlInterrupted
+from crawl_state import CrawlState
+from date_normalizer import normalize_dates
 from crawlers_common import NestedLoopBreaker
-from crawlers_common import get_between
+from crawlers_common import CrawlPipeline
+from crawlers_common import get_text
+from crawlers_common import parse_html
 from crawlers_common import mongo_collection
-from crawlers_common import insert_raw_collection
+from crawlers_common import ensure_indexes
+from crawlers_common import latest_datetime
+from crawlers_common import OLDEST_DATETIME
+from crawlers_common import BulkWriter
+
+FAKE_NEWS_CONTAINER = ('div', {'class': 'feed-post bstn-item-shape type-materia'})
+
+def uri_fake_news_FatoFake(page):
+    """Builds the URI of G1 Fato ou Fake news query page
+  
+    Args:
+        page (int): Number of page for query
+
+    Returns:
+        string: URI of G1 Fato ou Fake news query page
+    """
+
+    uri = f'https://g1.globo.com/fato-ou-fake/coronavirus/index/feed/pagina-{page}.ghtml' # set endpoint
+    return uri
 
 def get_html_fake_news_FatoFake(page):
     """Sends GET HTTP request in order to get the HTML of G1 Fato ou Fake news query page
@@ -24,15 +45,8 @@ def get_html_fake_news_FatoFake(page):
         string: HTML of G1 Fato ou Fake news query page | 'Failed to get HTML' if fails
     """
 
-    uri = f'https://g1.globo.com/fato-ou-fake/coronavirus/index/feed/pagina-{page}.ghtml' # set endpoint                                     # set endpoint
-
-    try:
-        print('Getting URI: ' + uri + '\n')
-        response = get(uri)
-        print('Result GET: ' + str(response) + '\n')
-        return response.text
-    except:
-        return 'Failed to get HTML'
+    uri = uri_fake_news_FatoFake(page)
+    return get_text(uri, 'Failed to get HTML')
 
 def scrap_fake_news_FatoFake(html):
     """Gets headline, date and link of content of fake news contained in HTML
@@ -45,9 +59,10 @@ def scrap_fake_news_FatoFake(html):
     """
 
     fake_news = []
+    date_strings = []
     if not (html == 'Failed to get HTML'):
-        page = BeautifulSoup(html, features='html.parser')
-        fake_news_containers = page.find_all('div', {'class': 'feed-post bstn-item-shape type-materia'})
+        page = parse_html(html, *FAKE_NEWS_CONTAINER)
+        fake_news_containers = page.find_all(*FAKE_NEWS_CONTAINER)
         for nc in fake_news_containers:
             # Get and treat fake news title
             obj_title = nc.find('a', {'class': 'feed-post-link gui-color-primary gui-color-hover'})
@@ -56,54 +71,65 @@ def scrap_fake_news_FatoFake(html):
             title = title.replace('É #FAKE ', '')
             # Get and treat fake_news link
             link = obj_title['href']
-            # Get and treat fake_news date
-            date_string = nc.find('span', {'class': 'feed-post-datetime'}).text
-            date = datetime.now()
-            if date_string == 'Ontem':
-                date = date - timedelta(days=1)
-            else:
-                int_value = int(get_between(date_string, ' ', ' '))
-                if "hora" in date_string:
-                    date = date - timedelta(hours=int_value)
-                if "dia" in date_string:
-                    date = date - timedelta(days=int_value)
-                if "semana" in date_string:
-                    date = date - timedelta(weeks=int_value)
-                if ("mes" in date_string) or ("mês" in date_string):
-                    date = date - timedelta(days=int_value*30)
-                if "ano" in date_string:
-                    date = date - timedelta(days=int_value*365)
+            # Get fake_news date (treated below for the whole page)
+            date_strings.append(nc.find('span', {'class': 'feed-post-datetime'}).text)
             # Construct object
-            fake_news_data = {'title': title, 'link': link, 'datetime': date}
+            fake_news_data = {'title': title, 'link': link}
             fake_news.append(fake_news_data)
+        for fake_news_data, date in zip(fake_news, normalize_dates(date_strings)):
+            fake_news_data['datetime'] = date
     return fake_news
 
-if __name__ == '__main__':
+def crawl_FatoFake(pipeline, since=None, until=None):
+    """Crawls G1 Fato ou Fake fake news into raw_FatoFake collection, from the most recent to the already stored ones
+  
+    Args:
+        pipeline (crawlers_common.CrawlPipeline): Fetch and parse stages of crawl
+        since (datetime.datetime): Stops at news older than this datetime (default: checkpoint)
+        until (datetime.datetime): Skips news more recent than this datetime
+
+    Returns:
+        crawlers_common.BatchReport: Counts of inserted, duplicated and failed news
+    """
+
     # Set target collection
-    FATOFAKE_COLLECTION = mongo_collection('raw_FatoFake')
-
-    # Get max datetime in collection (for duplicity control)
-    try:
-        MAX_DATETIME = FATOFAKE_COLLECTION.find().sort([("datetime", -1)]).limit(1)[0]['datetime']
-    except:
-        MAX_DATETIME = datetime(1900,1,1,0,0,0)
-
-    # Processing logic
-    page_number = 1
-    try:
-        while (True):
-            html = get_html_fake_news_FatoFake(page_number)
-            fake_news_scrapped = scrap_fake_news_FatoFake(html)
-            for fake_news in fake_news_scrapped:
-                # If fake news datetime is older than database registries, stop
-                if fake_news['datetime'] < MAX_DATETIME:
-                    raise NestedLoopBreaker()
-                inserted_id = insert_raw_collection(fake_news, FATOFAKE_COLLECTION)
-                print('Inserted object ' + inserted_id + ', dated on ' + 
-                fake_news['datetime'].strftime("%Y-%m-%d") + ' into raw_FatoFake collection')
-            page_number += 1
-
-    except NestedLoopBreaker:
-        pass
+    collection = mongo_collection('raw_FatoFake')
+    ensure_indexes(collection)
+
+    # Get checkpoint of last run (stop datetime for duplicity control and page to resume),
+    # runs over an explicit date range do not touch checkpoints
+    ranged = since is not None or until is not None
+    state = CrawlState('FatoFake', persist=not ranged)
+    max_datetime = (since or OLDEST_DATETIME) if ranged else state.begin(lambda: latest_datetime(collection))
+    first_page = state.page if state.page is not None else 1
+
+    # Processing logic (next pages are requested and parsed while the current one is stored)
+    uris = (uri_fake_news_FatoFake(page) for page in count(first_page))
+    with BulkWriter(collection) as writer:
+        try:
+            for page, fake_news_scrapped in enumerate(pipeline.scrap(uris, scrap_fake_news_FatoFake, 'Failed to get HTML'), first_page):
+                if fake_news_scrapped is None:
+                    raise CrawlInterrupted(f'Failed to get page {page}, next run resumes from it')
+                if not fake_news_scrapped:
+                    break
+                for fake_news in fake_news_scrapped:
+                    # If fake news datetime is older than database registries, stop
+                    if fake_news['datetime'] < max_datetime:
+                        raise NestedLoopBreaker()
+                    if until is not None and fake_news['datetime'] > until:
+                        continue
+                    writer.add(fake_news)
+                    state.observe(fake_news['datetime'])
+                writer.flush()
+                state.checkpoint(page + 1)
+        except NestedLoopBreaker:
+            pass
+        writer.flush()
+        state.finish()
+    return writer.totals
+
+if __name__ == '__main__':
+    with CrawlPipeline() as pipeline:
+        crawl_FatoFake(pipeline)
     
     print('Execution finished')
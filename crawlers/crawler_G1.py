@@ -5,22 +5,33 @@ Created in: 2021-04-03
 Description: Crawler to get news from G1
 """
 
-from bs4 import BeautifulSoup
+import re
 from datetime import datetime, timedelta
-from pymongo import MongoClient
-from requests import get
 from urllib.parse import unquote
+from crawl_state import CrawlInterrupted
+from crawl_state import CrawlState
+from date_normalizer import normalize_dates
 from crawlers_common import NestedLoopBreaker
+from crawlers_common import CrawlPipeline
 from crawlers_common import get_between
+from crawlers_common import get_text
+from crawlers_common import parse_html
 from crawlers_common import mongo_collection
-from crawlers_common import insert_raw_collection
+from crawlers_common import ensure_indexes
+from crawlers_common import latest_datetime
+from crawlers_common import OLDEST_DATETIME
+from crawlers_common import BulkWriter
 
 ENDPOINT = 'https://g1.globo.com/busca/'
 ORDER = 'recent'
 SPECIES = 'notícias'
+DEFAULT_SUBJECT = 'coronavirus'
+MAX_PAGES = 40                   # G1 search does not serve pages beyond this one
+AD_CLASS = re.compile('widget--info__title--ad')
+NEWS_CONTAINER = ('div', {'class': 'widget--info__text-container'})
 
-def get_html_news_G1(subject, date_from, time_from, date_to, time_to, page):
-    """Sends GET HTTP request in order to get the HTML of G1 news query page
+def uri_news_G1(subject, date_from, time_from, date_to, time_to, page):
+    """Builds the URI of G1 news query page
   
     Args:
         subject (string): Term used for querying news
@@ -28,10 +39,10 @@ def get_html_news_G1(subject, date_from, time_from, date_to, time_to, page):
         time_from (string): Initial time range for query (format: hh:mm:ss)
         date_to (string): End date range for query (format: yyyy-MM-dd)
         time_to (string): End time range for query (format: hh:mm:ss)
-        page (int): Number of page for query (1 to 40)
+        page (int): Number of page for query (1 to MAX_PAGES)
 
     Returns:
-        string: HTML of G1 news query page | 'Failed to get HTML' if fails
+        string: URI of G1 news query page
     """
 
     uri = ENDPOINT                                           # set endpoint
@@ -41,14 +52,25 @@ def get_html_news_G1(subject, date_from, time_from, date_to, time_to, page):
     uri += '&species=' + SPECIES                             # set query content type
     uri += '&from=' + date_from + 'T' + time_from + '-0300'  # set query init time range
     uri += '&to=' + date_to + 'T' + time_to + '-0300'        # set query end time range
+    return uri
+
+def get_html_news_G1(subject, date_from, time_from, date_to, time_to, page):
+    """Sends GET HTTP request in order to get the HTML of G1 news query page
+  
+    Args:
+        subject (string): Term used for querying news
+        date_from (string): Initial date range for query (format: yyyy-MM-dd)
+        time_from (string): Initial time range for query (format: hh:mm:ss)
+        date_to (string): End date range for query (format: yyyy-MM-dd)
+        time_to (string): End time range for query (format: hh:mm:ss)
+        page (int): Number of page for query (1 to MAX_PAGES)
+
+    Returns:
+        string: HTML of G1 news query page | 'Failed to get HTML' if fails
+    """
 
-    try:
-        print('Getting URI: ' + uri + '\n')
-        response = get(uri)
-        print('Result GET: ' + str(response) + '\n')
-        return response.text
-    except:
-        return 'Failed to get HTML'
+    uri = uri_news_G1(subject, date_from, time_from, date_to, time_to, page)
+    return get_text(uri, 'Failed to get HTML')
 
 def scrap_news_G1(html):
     """Gets headline, date and link of content of news contained in HTML
@@ -61,12 +83,13 @@ def scrap_news_G1(html):
     """
 
     news = []
+    date_strings = []
     if not (html == 'Failed to get HTML'):
-        page = BeautifulSoup(html, features='html.parser')
-        news_containers = page.find_all('div', {'class': 'widget--info__text-container'})
+        page = parse_html(html, *NEWS_CONTAINER)
+        news_containers = page.find_all(*NEWS_CONTAINER)
         for nc in news_containers:
             # Get and treat news title
-            if 'widget--info__title--ad' in str(nc):
+            if nc.find(class_=AD_CLASS):
                 continue
             title = nc.find('div', {'class': 'widget--info__title product-color'}).text
             title = title.rstrip('\n').strip()
@@ -74,57 +97,84 @@ def scrap_news_G1(html):
             link = nc.find('a')['href']
             link = get_between(link, 'https', 'ghtml', True)
             link = unquote(link)
-            # Get and treat news date
-            date_string = nc.find('div', {'class': 'widget--info__meta'}).text
-            date = datetime.now()
-            if "há" in date_string:
-                int_value = int(get_between(date_string, ' ', ' '))
-                if "hora" in date_string:
-                    date = date - timedelta(hours=int_value)
-                if "dia" in date_string:
-                    date = date - timedelta(days=int_value)
-            else:
-                date = datetime.strptime(date_string, '%d/%m/%Y %Hh%M')
+            # Get news date (treated below for the whole page)
+            date_strings.append(nc.find('div', {'class': 'widget--info__meta'}).text)
             # Construct object
-            news_data = {'title': title, 'link': link, 'datetime': date}
+            news_data = {'title': title, 'link': link}
             news.append(news_data)
+        for news_data, date in zip(news, normalize_dates(date_strings)):
+            news_data['datetime'] = date
     return news
 
-if __name__ == '__main__':
+def crawl_G1(pipeline, subject=DEFAULT_SUBJECT, since=None, until=None):
+    """Crawls G1 news into raw_G1 collection, day by day from the most recent to the already stored ones
+  
+    Args:
+        pipeline (crawlers_common.CrawlPipeline): Fetch and parse stages of crawl
+        subject (string): Term used for querying news
+        since (datetime.datetime): Stops at news older than this datetime (default: checkpoint)
+        until (datetime.datetime): Starts from the day of this datetime, skipping more recent news
+
+    Returns:
+        crawlers_common.BatchReport: Counts of inserted, duplicated and failed news
+    """
+
     # Set target collection
-    G1_COLLECTION = mongo_collection('raw_G1')
+    collection = mongo_collection('raw_G1')
+    ensure_indexes(collection)
 
-    # Get max datetime in collection (for duplicity control)
-    try:
-        MAX_DATETIME = G1_COLLECTION.find().sort([("datetime", -1)]).limit(1)[0]['datetime']
-    except:
-        MAX_DATETIME = datetime(1900,1,1,0,0,0)
+    # Get checkpoint of last run (stop datetime for duplicity control, day and page to resume),
+    # runs over an explicit date range do not touch checkpoints
+    ranged = since is not None or until is not None
+    default_subject = subject == DEFAULT_SUBJECT
+    state = CrawlState('G1' if default_subject else 'G1:' + subject, persist=not ranged)
+    stored_until = (lambda: latest_datetime(collection)) if default_subject else (lambda: OLDEST_DATETIME)
+    max_datetime = (since or OLDEST_DATETIME) if ranged else state.begin(stored_until)
 
     # Initializing datetime for querying 
-    query_date = datetime.now()
+    if state.cursor is not None:
+        query_date = datetime.strptime(state.cursor, "%Y-%m-%d")
+    else:
+        query_date = until or datetime.now()
     query_date_str = query_date.strftime("%Y-%m-%d")
+    first_page = state.page if state.page is not None else 1
 
-    # Processing logic
-    try:
-        while (True):
-            for page in range(1,41):
-                html = get_html_news_G1('coronavirus', query_date_str, '00:00:00', 
-                                        query_date_str, '23:59:59', page)
-                news_scrapped = scrap_news_G1(html)
-                if not news_scrapped:
-                    break
-                for news in news_scrapped:
-                    # If news datetime is older than database registries, stop
-                    if news['datetime'] < MAX_DATETIME:
-                        raise NestedLoopBreaker()
-                    inserted_id = insert_raw_collection(news, G1_COLLECTION)
-                    print('Inserted object ' + inserted_id + ', dated on ' + 
-                    news['datetime'].strftime("%Y-%m-%d") + ' into raw_G1 collection')
-            # Previous day
-            query_date = query_date - timedelta(days=1)
-            query_date_str = query_date.strftime("%Y-%m-%d")
-
-    except NestedLoopBreaker:
-        pass
+    # Processing logic (pages of a day are requested and parsed while the current one is stored)
+    with BulkWriter(collection) as writer:
+        try:
+            while (query_date.date() >= max_datetime.date()):
+                uris = [uri_news_G1(subject, query_date_str, '00:00:00', query_date_str, '23:59:59', page)
+                        for page in range(first_page, MAX_PAGES + 1)]
+                for page, news_scrapped in enumerate(pipeline.scrap(uris, scrap_news_G1, 'Failed to get HTML'), first_page):
+                    if news_scrapped is None:
+                        raise CrawlInterrupted(f'Failed to get page {page} of {query_date_str}, '
+                                               'next run resumes from it')
+                    if not news_scrapped:
+                        break
+                    for news in news_scrapped:
+                        # If news datetime is older than database registries, stop
+                        if news['datetime'] < max_datetime:
+                            raise NestedLoopBreaker()
+                        if until is not None and news['datetime'] > until:
+                            continue
+                        writer.add(news)
+                        state.observe(news['datetime'])
+                    writer.flush()
+                    state.checkpoint(page + 1, query_date_str)
+                # Previous day
+                query_date = query_date - timedelta(days=1)
+                query_date_str = query_date.strftime("%Y-%m-%d")
+                first_page = 1
+                state.checkpoint(first_page, query_date_str)
+
+        except NestedLoopBreaker:
+            pass
+        writer.flush()
+        state.finish()
+    return writer.totals
+
+if __name__ == '__main__':
+    with CrawlPipeline() as pipeline:
+        crawl_G1(pipeline)
     
-    print('Execution finished')
\ No newline at end of file
+    print('Execution finished')
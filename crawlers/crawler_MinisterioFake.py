@@ -5,37 +5,50 @@ Created in: 2021-04-04
 Description: Crawler to get fake news from Ministerio da Saude
 """
 
-from bs4 import BeautifulSoup
 from datetime import datetime
-from pymongo import MongoClient
-from requests import get
+from itertools import count
+from crawl_state import CrawlInterrupted
+from crawl_state import CrawlState
 from crawlers_common import NestedLoopBreaker
+from crawlers_common import CrawlPipeline
+from crawlers_common import get_text
+from crawlers_common import parse_html
 from crawlers_common import mongo_collection
-from crawlers_common import insert_raw_collection
+from crawlers_common import ensure_indexes
+from crawlers_common import existing_title_hashes
+from crawlers_common import title_hash
+from crawlers_common import BulkWriter
 
 ENDPOINT = 'https://antigo.saude.gov.br/component/tags/tag/novo-coronavirus-fake-news'
 CHUNK_SIZE = 20
+FAKE_NEWS_CONTAINER = ('td', {'class': 'list-title'})
 
-def get_html_fake_news_Ministerio(page):
-    """Sends GET HTTP request in order to get the HTML of Ministerio da Saude fake news query page
+def uri_fake_news_Ministerio(page):
+    """Builds the URI of Ministerio da Saude fake news query page
   
     Args:
         page (int): Number of page for query - depends on number of registries (20)
 
     Returns:
-        string: HTML of Ministerio da Saude fake news query page | 'Failed to get HTML' if fails
+        string: URI of Ministerio da Saude fake news query page
     """
     paging = page*CHUNK_SIZE          # set paging
     uri = ENDPOINT                    # set endpoint
     uri += '?start=' + str(paging)    # set module name
+    return uri
+
+def get_html_fake_news_Ministerio(page):
+    """Sends GET HTTP request in order to get the HTML of Ministerio da Saude fake news query page
+  
+    Args:
+        page (int): Number of page for query - depends on number of registries (20)
+
+    Returns:
+        string: HTML of Ministerio da Saude fake news query page | 'Failed to get HTML' if fails
+    """
 
-    try: 
-        print('Getting URI: ' + uri + '\n')
-        response = get(uri)
-        print('Result GET: ' + str(response) + '\n')
-        return response.text
-    except:
-        return 'Failed to get HTML'
+    uri = uri_fake_news_Ministerio(page)
+    return get_text(uri, 'Failed to get HTML')
 
 def scrap_fake_news_Ministerio(html):
     """Gets headline and link of content of fake news contained in HTML
@@ -49,8 +62,8 @@ def scrap_fake_news_Ministerio(html):
 
     fake_news = []
     if not (html == 'Failed to get HTML'):
-        page = BeautifulSoup(html, features='html.parser')
-        fake_news_containers = page.find_all('td', {'class':'list-title'})
+        page = parse_html(html, *FAKE_NEWS_CONTAINER)
+        fake_news_containers = page.find_all(*FAKE_NEWS_CONTAINER)
         for nc in fake_news_containers:
             # Get and treat fake news title
             obj_title = nc.find('a')
@@ -66,26 +79,51 @@ def scrap_fake_news_Ministerio(html):
             fake_news.append(fake_news_data)
     return fake_news
 
-if __name__ == '__main__':
+def crawl_MinisterioFake(pipeline):
+    """Crawls Ministerio da Saude fake news into raw_MinisterioFake collection, until an already stored one
+  
+    Args:
+        pipeline (crawlers_common.CrawlPipeline): Fetch and parse stages of crawl
+
+    Returns:
+        crawlers_common.BatchReport: Counts of inserted, duplicated and failed fake news
+    """
+
     # Set target collection
-    MINISTERIOFAKE_COLLECTION = mongo_collection('raw_MinisterioFake')
-
-    # Processing logic
-    page_number = 0
-    try:
-        while (True):
-            html = get_html_fake_news_Ministerio(page_number)
-            fake_news_scrapped = scrap_fake_news_Ministerio(html)
-            for fake_news in fake_news_scrapped:
-                # If news alredy exists in database registries, stop
-                if MINISTERIOFAKE_COLLECTION.count_documents({'title': fake_news['title']}):
-                    raise NestedLoopBreaker()
-                inserted_id = insert_raw_collection(fake_news, MINISTERIOFAKE_COLLECTION)
-                print('Inserted object ' + inserted_id + ', dated on ' + 
-                fake_news['datetime'].strftime("%Y-%m-%d") + ' into raw_MinisterioFake collection')
-            page_number += 1
-
-    except NestedLoopBreaker:
-        pass
+    collection = mongo_collection('raw_MinisterioFake')
+    ensure_indexes(collection)
+
+    # Get checkpoint of last run (page to resume)
+    state = CrawlState('MinisterioFake')
+    state.begin()
+    first_page = state.page if state.page is not None else 0
+
+    # Processing logic (next pages are requested and parsed while the current one is stored)
+    uris = (uri_fake_news_Ministerio(page) for page in count(first_page))
+    with BulkWriter(collection) as writer:
+        try:
+            for page, fake_news_scrapped in enumerate(pipeline.scrap(uris, scrap_fake_news_Ministerio, 'Failed to get HTML'), first_page):
+                if fake_news_scrapped is None:
+                    raise CrawlInterrupted(f'Failed to get page {page}, next run resumes from it')
+                if not fake_news_scrapped:
+                    break
+                existing = existing_title_hashes(collection,
+                                                 [f['title'] for f in fake_news_scrapped])
+                for fake_news in fake_news_scrapped:
+                    # If news alredy exists in database registries, stop
+                    if title_hash(fake_news['title']) in existing:
+                        raise NestedLoopBreaker()
+                    writer.add(fake_news)
+                writer.flush()
+                state.checkpoint(page + 1)
+        except NestedLoopBreaker:
+            pass
+        writer.flush()
+        state.finish()
+    return writer.totals
+
+if __name__ == '__main__':
+    with CrawlPipeline() as pipeline:
+        crawl_MinisterioFake(pipeline)
     
     print('Execution finished')
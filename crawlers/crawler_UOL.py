@@ -5,27 +5,34 @@ Created in: 2021-04-04
 Description: Crawler to get news from UOL
 """
 
-from bs4 import BeautifulSoup
 from datetime import datetime
-from pymongo import MongoClient
-from requests import get
+from itertools import count
+from crawl_state import CrawlInterrupted
+from crawl_state import CrawlState
+from date_normalizer import normalize_dates
 from crawlers_common import NestedLoopBreaker
-from crawlers_common import get_between
+from crawlers_common import CrawlPipeline
+from crawlers_common import get_text
+from crawlers_common import parse_html
 from crawlers_common import mongo_collection
-from crawlers_common import insert_raw_collection
+from crawlers_common import ensure_indexes
+from crawlers_common import latest_datetime
+from crawlers_common import OLDEST_DATETIME
+from crawlers_common import BulkWriter
 
 ENDPOINT = 'https://noticias.uol.com.br/service/'
 LOAD_COMPONENT = 'results-index'
 CHUNK_SIZE = 50
+NEWS_CONTAINER = ('div', {'class': 'thumbnails-item grid col-xs-4 col-sm-6 small'})
 
-def get_html_news_UOL(page):
-    """Sends GET HTTP request in order to get the HTML of UOL news query page
+def uri_news_UOL(page):
+    """Builds the URI of UOL news query page
   
     Args:
         page (int): Number of page for query
 
     Returns:
-        string: HTML of UOL news query page | 'Failed to get HTML' if fails
+        string: URI of UOL news query page
     """
     paging = page*CHUNK_SIZE                            # set paging
     uri = ENDPOINT                                      # set endpoint
@@ -34,14 +41,20 @@ def get_html_news_UOL(page):
                          {"params":{"size":''' + str(CHUNK_SIZE) + ''',"charset":"utf-8",
                           "repository":"mix2","sort":"created:desc","pgv3":true,
                           "tags-id":"72019","next":"0001H0U''' + str(paging) + 'N"}}}'
+    return uri
+
+def get_html_news_UOL(page):
+    """Sends GET HTTP request in order to get the HTML of UOL news query page
+  
+    Args:
+        page (int): Number of page for query
+
+    Returns:
+        string: HTML of UOL news query page | 'Failed to get HTML' if fails
+    """
 
-    try:
-        print('Getting URI: ' + uri + '\n')
-        response = get(uri)
-        print('Result GET: ' + str(response) + '\n')
-        return response.text
-    except:
-        return 'Failed to get HTML'
+    uri = uri_news_UOL(page)
+    return get_text(uri, 'Failed to get HTML')
 
 def scrap_news_UOL(html):
     """Gets headline, date and link of content of news contained in HTML
@@ -54,50 +67,74 @@ def scrap_news_UOL(html):
     """
 
     news = []
+    date_strings = []
     if not (html == 'Failed to get HTML'):
-        page = BeautifulSoup(html, features='html.parser')
-        news_containers = page.find_all('div', {'class': 'thumbnails-item grid col-xs-4 col-sm-6 small'})
+        page = parse_html(html, *NEWS_CONTAINER)
+        news_containers = page.find_all(*NEWS_CONTAINER)
         for nc in news_containers:
             # Get and treat news title
             title = nc.find('h3', {'class': 'thumb-title title-xsmall title-lg-small'}).text
             # Get and treat news link
             link = nc.find('a')['href']
-            # Get and treat news date
-            date_string = nc.find('time', {'class': 'thumb-date'}).text
-            date = datetime.strptime(date_string, '%d/%m/%Y %Hh%M')
+            # Get news date (treated below for the whole page)
+            date_strings.append(nc.find('time', {'class': 'thumb-date'}).text)
             # Construct object
-            news_data = {'title': title, 'link': link, 'datetime': date}
+            news_data = {'title': title, 'link': link}
             news.append(news_data)
+        for news_data, date in zip(news, normalize_dates(date_strings)):
+            news_data['datetime'] = date
     return news
 
-if __name__ == '__main__':
+def crawl_UOL(pipeline, since=None, until=None):
+    """Crawls UOL news into raw_UOL collection, from the most recent to the already stored ones
+  
+    Args:
+        pipeline (crawlers_common.CrawlPipeline): Fetch and parse stages of crawl
+        since (datetime.datetime): Stops at news older than this datetime (default: checkpoint)
+        until (datetime.datetime): Skips news more recent than this datetime
+
+    Returns:
+        crawlers_common.BatchReport: Counts of inserted, duplicated and failed news
+    """
+
     # Set target collection
-    UOL_COLLECTION = mongo_collection('raw_UOL')
-
-    # Get max datetime in collection (for duplicity control)
-    try:
-        MAX_DATETIME = UOL_COLLECTION.find().sort([("datetime", -1)]).limit(1)[0]['datetime']
-    except:
-        MAX_DATETIME = datetime(1900,1,1,0,0,0)
-
-    # Processing logic
-    page_number = 0
-    try:
-        while (True):
-            html = get_html_news_UOL(page_number)
-            news_scrapped = scrap_news_UOL(html)
-            if not news_scrapped:
-                break
-            for news in news_scrapped:
-                # If news datetime is older than database registries, stop
-                if news['datetime'] < MAX_DATETIME:
-                    raise NestedLoopBreaker()
-                inserted_id = insert_raw_collection(news, UOL_COLLECTION)
-                print('Inserted object ' + inserted_id + ', dated on ' + 
-                news['datetime'].strftime("%Y-%m-%d") + ' into raw_UOL collection')
-            page_number += 1
-
-    except NestedLoopBreaker:
-        pass
+    collection = mongo_collection('raw_UOL')
+    ensure_indexes(collection)
+
+    # Get checkpoint of last run (stop datetime for duplicity control and page to resume),
+    # runs over an explicit date range do not touch checkpoints
+    ranged = since is not None or until is not None
+    state = CrawlState('UOL', persist=not ranged)
+    max_datetime = (since or OLDEST_DATETIME) if ranged else state.begin(lambda: latest_datetime(collection))
+    first_page = state.page if state.page is not None else 0
+
+    # Processing logic (next pages are requested and parsed while the current one is stored)
+    uris = (uri_news_UOL(page) for page in count(first_page))
+    with BulkWriter(collection) as writer:
+        try:
+            for page, news_scrapped in enumerate(pipeline.scrap(uris, scrap_news_UOL, 'Failed to get HTML'), first_page):
+                if news_scrapped is None:
+                    raise CrawlInterrupted(f'Failed to get page {page}, next run resumes from it')
+                if not news_scrapped:
+                    break
+                for news in news_scrapped:
+                    # If news datetime is older than database registries, stop
+                    if news['datetime'] < max_datetime:
+                        raise NestedLoopBreaker()
+                    if until is not None and news['datetime'] > until:
+                        continue
+                    writer.add(news)
+                    state.observe(news['datetime'])
+                writer.flush()
+                state.checkpoint(page + 1)
+        except NestedLoopBreaker:
+            pass
+        writer.flush()
+        state.finish()
+    return writer.totals
+
+if __name__ == '__main__':
+    with CrawlPipeline() as pipeline:
+        crawl_UOL(pipeline)
     
-    print('Execution finished')
\ No newline at end of file
+    print('Execution finished')
@@ -5,9 +5,50 @@ Created in: 2021-04-03
 Description: Common functions to help crawlers development
 """
 
+import os
 import re
-from pymongo import MongoClient
+import time
+import hashlib
+import asyncio
+import aiohttp
+import threading
+import unicodedata
+from datetime import datetime
+from bs4 import BeautifulSoup, SoupStrainer
+from collections import deque, namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from urllib.parse import urlsplit
+from pymongo import MongoClient, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from requests import Session, RequestException
+from response_cache import ResponseCache
 
+DEFAULT_CONCURRENCY_PER_HOST = 4   # simultaneous connections kept open to each host
+DEFAULT_PREFETCH_DEPTH = 8         # pages requested ahead of the one being processed
+DEFAULT_TIMEOUT = 60               # seconds for a whole request/response cycle
+
+DEFAULT_BATCH_SIZE = 500           # documents per bulk write
+DEFAULT_FLUSH_INTERVAL = 5         # seconds a document may wait in a write buffer
+DUPLICATE_KEY_ERROR = 11000        # MongoDB error code for unique index violations
+OLDEST_DATETIME = datetime(1900,1,1,0,0,0)
+
+try:
+    import lxml
+    DEFAULT_HTML_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_HTML_PARSER = 'html.parser'
+
+HTML_PARSER = os.environ.get('CRAWLER_HTML_PARSER', DEFAULT_HTML_PARSER)
+STRAIN_HTML = True                 # build only the subtrees of news containers
+
+HTTP_SESSION = Session()           # keep-alive pool shared by synchronous fetches
+RESPONSE_CACHE = ResponseCache.from_environment()   # opt-in, see response_cache
+
+MONGO_CLIENT = None                # pooled client shared by all collections, see mongo_database
+MONGO_CLIENT_LOCK = threading.Lock()
+INSERT_LISTENERS = []              # functions called with each batch of new documents, see BulkWriter
+
+BatchReport = namedtuple('BatchReport', ['inserted', 'duplicates', 'failed'])
 
 class NestedLoopBreaker(Exception): pass
 
@@ -32,6 +73,287 @@ def get_between(base_string, before, after, includes = False):
     else: 
         return ''
 
+def parse_html(html, name, attrs):
+    """Parses HTML with the configured backend, keeping only the containers of news
+
+    Args:
+        html (string): Open HTML of query page
+        name (string): Tag name of news containers
+        attrs (dictionary): Attributes of news containers (as in find_all)
+
+    Returns:
+        bs4.BeautifulSoup: Tree holding the containers of news (whole page if STRAIN_HTML is False)
+    """
+
+    strainer = SoupStrainer(name, attrs) if STRAIN_HTML else None
+    return BeautifulSoup(html, features=HTML_PARSER, parse_only=strainer)
+
+def get_text(uri, failure):
+    """Sends GET HTTP request through the shared keep-alive session
+  
+    Args:
+        uri (string): Full URI to request
+        failure (string): Value returned when the request fails
+
+    Returns:
+        string: Body of the response | failure if fails
+    """
+
+    cache = RESPONSE_CACHE
+    if cache:
+        cached = cache.cached(uri)
+        if cached is not None or cache.offline:
+            return cached if cached is not None else failure
+    try:
+        print('Getting URI: ' + uri + '\n')
+        headers = cache.conditional_headers(uri) if cache else {}
+        response = HTTP_SESSION.get(uri, headers=headers, timeout=DEFAULT_TIMEOUT)
+        print('Result GET: ' + str(response) + '\n')
+        if cache:
+            return cache.update(uri, response.status_code, response.text, response.headers)
+        return response.text
+    except RequestException:
+        return failure
+
+class AsyncFetcher:
+    """Concurrent HTTP fetch engine shared by all crawlers
+
+    Runs an asyncio event loop in a background thread, so the synchronous crawler
+    loops can keep feeding URIs while several requests are in flight. Connections
+    are pooled and kept alive per host, the number of simultaneous requests to each
+    host is capped and an optional per-host rate limit spaces consecutive requests.
+    Responses go through the response cache when one is configured. Crawlers of
+    sources on the same host should share a fetcher, so they share its limits.
+  
+    Args:
+        concurrency_per_host (int): Maximum simultaneous requests to the same host
+        requests_per_second (float): Maximum request rate per host (None for unlimited)
+        timeout (int): Seconds for a whole request/response cycle
+        cache (response_cache.ResponseCache): Response cache (default: RESPONSE_CACHE)
+        host_limits (dictionary): (concurrency, requests per second) of specific hosts | None
+    """
+
+    def __init__(self, concurrency_per_host=DEFAULT_CONCURRENCY_PER_HOST,
+                 requests_per_second=None, timeout=DEFAULT_TIMEOUT, cache=None, host_limits=None):
+        self.concurrency_per_host = concurrency_per_host
+        self.requests_per_second = requests_per_second
+        self.host_limits = host_limits or {}
+        self.timeout = timeout
+        self.cache = cache if cache is not None else RESPONSE_CACHE
+        self._semaphores = {}
+        self._throttle_locks = {}
+        self._next_slots = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        self._session = self._submit(self._open_session()).result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    async def _open_session(self):
+        limit_per_host = max([self.concurrency_per_host] + [c for c, _ in self.host_limits.values()])
+        connector = aiohttp.TCPConnector(limit=0, limit_per_host=limit_per_host)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def _close_session(self):
+        # Cancel requests nobody is waiting for anymore before closing the pool
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        await self._session.close()
+
+    async def _throttle(self, host):
+        # Reserve the next free time slot of the host and wait for it
+        requests_per_second = self.host_limits.get(host, (None, self.requests_per_second))[1]
+        if not requests_per_second:
+            return
+        lock = self._throttle_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = self._loop.time()
+            slot = max(now, self._next_slots.get(host, now))
+            self._next_slots[host] = slot + 1 / requests_per_second
+        await asyncio.sleep(slot - now)
+
+    async def fetch(self, uri, failure):
+        """Coroutine that requests one URI respecting host concurrency and rate limits
+      
+        Args:
+            uri (string): Full URI to request
+            failure (string): Value returned when the request fails
+
+        Returns:
+            string: Body of the response | failure if fails
+        """
+
+        cache = self.cache
+        if cache:
+            cached = cache.cached(uri)
+            if cached is not None or cache.offline:
+                return cached if cached is not None else failure
+        host = urlsplit(uri).netloc
+        concurrency = self.host_limits.get(host, (self.concurrency_per_host, None))[0]
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(concurrency))
+        async with semaphore:
+            await self._throttle(host)
+            try:
+                print('Getting URI: ' + uri + '\n')
+                headers = cache.conditional_headers(uri) if cache else {}
+                async with self._session.get(uri, headers=headers) as response:
+                    text = await response.text()
+                    print('Result GET: <Response [' + str(response.status) + ']>\n')
+                    if cache:
+                        return cache.update(uri, response.status, text, response.headers)
+                    return text
+            except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeDecodeError):
+                return failure
+
+    def get(self, uri, failure):
+        """Requests one URI and waits for its body
+      
+        Args:
+            uri (string): Full URI to request
+            failure (string): Value returned when the request fails
+
+        Returns:
+            string: Body of the response | failure if fails
+        """
+
+        return self._submit(self.fetch(uri, failure)).result()
+
+    def iter_fetch(self, uris, failure, depth=DEFAULT_PREFETCH_DEPTH):
+        """Pipelines requests of URIs, yielding bodies in the same order of URIs
+      
+        Up to depth requests are kept in flight ahead of the body being consumed, so
+        uris may be an endless generator. Requests still pending when the consumer
+        stops iterating are cancelled.
+
+        Args:
+            uris (iterable of string): URIs to request, in processing order
+            failure (string): Value yielded for requests that fail
+            depth (int): Maximum number of requests in flight
+
+        Returns:
+            generator of string: Bodies of the responses | failure for each one that fails
+        """
+
+        uris = iter(uris)
+        in_flight = deque()
+        try:
+            for uri in uris:
+                in_flight.append(self._submit(self.fetch(uri, failure)))
+                if len(in_flight) >= depth:
+                    break
+            while in_flight:
+                body = in_flight.popleft().result()
+                uri = next(uris, None)
+                if uri is not None:
+                    in_flight.append(self._submit(self.fetch(uri, failure)))
+                yield body
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def close(self):
+        """Closes pooled connections and stops the background event loop"""
+
+        self._submit(self._close_session()).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+class CrawlPipeline:
+    """Fetch, parse and store stages of a crawl running overlapped
+
+    Pages are fetched by an AsyncFetcher and parsed by the scrap function in a pool
+    of processes, so CPU-bound parsing never leaves the network idle. The store stage
+    is the caller loop, which consumes scraped pages in order. Each stage holds at
+    most depth pages (requests in flight, pages being parsed) and only advances when
+    the next one consumes, so memory stays flat however long the crawl is.
+  
+    Args:
+        fetcher (AsyncFetcher): Fetch engine (default: new AsyncFetcher owned by the pipeline)
+        parse_workers (int): Number of parsing processes (default: number of CPUs)
+        depth (int): Maximum number of pages held by each stage
+        executor (concurrent.futures.Executor): Pool shared with other pipelines (replaces parse_workers)
+    """
+
+    def __init__(self, fetcher=None, parse_workers=None, depth=DEFAULT_PREFETCH_DEPTH, executor=None):
+        self._owns_fetcher = fetcher is None
+        self._owns_executor = executor is None
+        self.fetcher = fetcher if fetcher is not None else AsyncFetcher()
+        self.depth = depth
+        self.pages = 0
+        self._executor = executor if executor is not None else ProcessPoolExecutor(max_workers=parse_workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def scrap(self, uris, scrap, failure):
+        """Fetches and scraps pages of URIs, yielding the scraped data in the same order
+      
+        Args:
+            uris (iterable of string): URIs to request, in processing order
+            scrap (function): Module level scrap function of source (runs in another process)
+            failure (string): Value returned by the fetch when a request fails
+
+        Returns:
+            generator of list: Structured data scraped of each page | None if its request failed
+        """
+
+        bodies = self.fetcher.iter_fetch(uris, failure, self.depth)
+        parsing = deque()
+        try:
+            for body in bodies:
+                if body == failure:
+                    parsed = Future()
+                    parsed.set_result(None)
+                else:
+                    parsed = self._executor.submit(scrap, body)
+                parsing.append(parsed)
+                if len(parsing) >= self.depth:
+                    self.pages += 1
+                    yield parsing.popleft().result()
+            while parsing:
+                self.pages += 1
+                yield parsing.popleft().result()
+        finally:
+            for parsed in parsing:
+                parsed.cancel()
+            bodies.close()
+
+    def close(self):
+        """Stops the owned parsing processes and fetch engine"""
+
+        if self._owns_executor:
+            self._executor.shutdown()
+        if self._owns_fetcher:
+            self.fetcher.close()
+
+def mongo_database():
+    """Gets the project MongoDB database through the shared (pooled and thread-safe) client
+  
+    Returns:
+        pymongo.database.Database: MongoDB database of the project
+    """
+    global MONGO_CLIENT
+    if MONGO_CLIENT is None:
+        with MONGO_CLIENT_LOCK:   # crawlers of several threads may ask for the first client at once
+            if MONGO_CLIENT is None:
+                MONGO_CLIENT = MongoClient('localhost', 27017)
+    return MONGO_CLIENT['covid-fake-news-detection']
+
 def mongo_collection(collection):
     """Creates new object to a specific MongoDB collection
   
@@ -41,8 +363,7 @@ def mongo_collection(collection):
     Returns:
         pymongo.collection.Collection: MongoDB collection targered
     """
-    client = MongoClient('localhost', 27017)
-    db = client['covid-fake-news-detection']
+    db = mongo_database()
     collection = db[collection]
     return collection
 
@@ -60,26 +381,224 @@ def insert_raw_collection(data, collection):
     try: 
         inserted_id = collection.insert_one(data).inserted_id
         return str(inserted_id)
-    except:
+    except PyMongoError:
         return ''
 
-def portuguese_month_replacer(base_string):
-    """Replaces Portuguese month name with its corresponding number into string
+def title_hash(title):
+    """Hashes the normalized form of a headline (no accents, case, punctuation or extra spaces)
+  
+    Args:
+        title (string): Headline of news
+
+    Returns:
+        string: SHA-1 hex digest of normalized headline
+    """
+
+    normalized = unicodedata.normalize('NFKD', str(title))
+    normalized = ''.join(c for c in normalized if not unicodedata.combining(c)).lower()
+    normalized = ' '.join(re.sub(r'[^\w\s]', ' ', normalized).split())
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+def ensure_indexes(collection):
+    """Creates (if missing) the indexes used for deduplication and incremental crawling
+  
+    Args:
+        collection (pymongo.collection.Collection): MongoDB collection targered
+
+    Returns:
+        Nothing
+    """
+
+    collection.create_index('title_hash', unique=True, name='title_hash_unique')
+    collection.create_index('link', unique=True, name='link_unique',
+                            partialFilterExpression={'link': {'$type': 'string'}})
+    collection.create_index([('datetime', DESCENDING)], name='datetime_desc')
+
+def latest_datetime(collection):
+    """Gets the datetime of the most recent news of collection (uses datetime index)
+  
+    Args:
+        collection (pymongo.collection.Collection): MongoDB collection targered
+
+    Returns:
+        datetime.datetime: Most recent datetime | OLDEST_DATETIME if collection is empty
+    """
+
+    latest = collection.find_one({'datetime': {'$exists': True}}, {'datetime': 1},
+                                 sort=[('datetime', DESCENDING)])
+    return latest['datetime'] if latest else OLDEST_DATETIME
+
+def existing_title_hashes(collection, titles):
+    """Gets which headlines are already stored in collection with one indexed query
+  
+    Args:
+        collection (pymongo.collection.Collection): MongoDB collection targered
+        titles (list of string): Headlines of news
+
+    Returns:
+        set of string: Title hashes of the headlines found in collection
+    """
+
+    hashes = [title_hash(t) for t in titles]
+    found = collection.find({'title_hash': {'$in': hashes}}, {'title_hash': 1, '_id': 0})
+    return {f['title_hash'] for f in found}
+
+class BulkWriter:
+    """Buffered writer that groups documents into unordered bulk writes
+
+    Documents are flushed when the buffer reaches batch_size and, by a background
+    thread, when the oldest buffered document waited more than flush_interval.
+    Every flush prints and returns how many documents were inserted, rejected as
+    duplicates or failed, and these counts are accumulated in totals.
+
+    By default documents are upserted by the hash of their normalized title (see
+    ensure_indexes), so writing the same news again is a no-op. With key=None
+    documents are inserted as they are.
+
+    After each flush, the functions in INSERT_LISTENERS are called with the name of
+    the collection and the documents actually inserted (with their _id), so news
+    can be processed as soon as it is stored. Listeners run while the buffer is
+    locked, so they should only hand the documents over.
   
     Args:
-        base_string (string): String containing Portuguese month name
+        collection (pymongo.collection.Collection): MongoDB collection targered
+        batch_size (int): Number of buffered documents that triggers a flush
+        flush_interval (float): Seconds after which buffered documents are flushed
+        key (string): Unique field used to upsert documents | None for plain inserts
+    """
+
+    def __init__(self, collection, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, key='title_hash'):
+        self.collection = collection
+        self.key = key
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.totals = BatchReport(0, 0, 0)
+        self._buffer = []
+        self._buffered_since = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, document):
+        """Buffers one document, flushing the buffer if it is full
+      
+        Args:
+            document (dictionary): Data for inserting into collection
+
+        Returns:
+            Nothing
+        """
+
+        if self.key == 'title_hash' and 'title_hash' not in document:
+            document['title_hash'] = title_hash(document['title'])
+        with self._lock:
+            if not self._buffer:
+                self._buffered_since = time.monotonic()
+            self._buffer.append(document)
+            if len(self._buffer) >= self.batch_size:
+                self._flush_buffer()
+
+    def extend(self, documents):
+        """Buffers a batch of documents, flushing every full buffer
+
+        Args:
+            documents (list of dictionary): Data for inserting into collection
+
+        Returns:
+            Nothing
+        """
+
+        if self.key == 'title_hash':
+            for document in documents:
+                if 'title_hash' not in document:
+                    document['title_hash'] = title_hash(document['title'])
+        with self._lock:
+            if not self._buffer:
+                self._buffered_since = time.monotonic()
+            self._buffer.extend(documents)
+            while len(self._buffer) >= self.batch_size:
+                remaining = self._buffer[self.batch_size:]
+                self._buffer = self._buffer[:self.batch_size]
+                self._flush_buffer()
+                self._buffer = remaining
+                self._buffered_since = time.monotonic()
+
+    def flush(self):
+        """Writes all buffered documents into the collection
+      
+        Returns:
+            BatchReport: Counts of inserted, duplicated and failed documents of the batch
+        """
+
+        with self._lock:
+            return self._flush_buffer()
+
+    def close(self):
+        """Stops the periodic flusher and writes the remaining documents"""
+
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval / 2):
+            with self._lock:
+                if self._buffer and time.monotonic() - self._buffered_since >= self.flush_interval:
+                    self._flush_buffer()
+
+    def _flush_buffer(self):
+        if not self._buffer:
+            return BatchReport(0, 0, 0)
+        batch, self._buffer = self._buffer, []
+        report, inserted = self._write(batch)
+        if inserted:
+            for listener in INSERT_LISTENERS:
+                listener(self.collection.name, inserted)
+        self.totals = BatchReport(*[t + r for t, r in zip(self.totals, report)])
+        print(f'Flushed batch of {len(batch)} objects into {self.collection.name} collection: '
+              f'{report.inserted} inserted, {report.duplicates} duplicates, {report.failed} failed')
+        return report
+
+    def _write(self, batch):
+        try:
+            if self.key is None:
+                result = self.collection.insert_many(batch, ordered=False)
+                return BatchReport(len(result.inserted_ids), 0, 0), batch
+            requests = [UpdateOne({self.key: d[self.key]}, {'$setOnInsert': d}, upsert=True)
+                        for d in batch]
+            result = self.collection.bulk_write(requests, ordered=False)
+            return BatchReport(result.upserted_count, len(batch) - result.upserted_count, 0), \
+                   upserted_documents(batch, result.upserted_ids.items())
+        except BulkWriteError as error:
+            inserted = error.details['nInserted'] + error.details['nUpserted']
+            duplicates = error.details['nMatched'] + sum(
+                1 for e in error.details['writeErrors'] if e['code'] == DUPLICATE_KEY_ERROR)
+            report = BatchReport(inserted, duplicates, len(batch) - inserted - duplicates)
+            if self.key is None:
+                rejected = {e['index'] for e in error.details['writeErrors']}
+                return report, [d for i, d in enumerate(batch) if i not in rejected]
+            return report, upserted_documents(batch, ((u['index'], u['_id']) for u in error.details['upserted']))
+        except PyMongoError as error:
+            print(f'Failed to write batch into {self.collection.name} collection: {error}')
+            return BatchReport(0, 0, len(batch)), []
+
+def upserted_documents(batch, upserted_ids):
+    """Gets the documents of a bulk write that were inserted by an upsert
+
+    Args:
+        batch (list of dictionary): Documents of bulk write, in request order
+        upserted_ids (iterable of tuple): (request index, _id) of each upsert
 
     Returns:
-        string: New string (lowered) with Portuguese month name replaced by its number
+        list of dictionary: Inserted documents with their _id
     """
 
-    base_string = base_string.lower()
-    mapping = {'janeiro': 1, 'fevereiro': 2, 'março': 3,
-               'abril': 4, 'maio': 5, 'junho': 6,
-               'julho': 7, 'agosto': 8, 'setembro': 9, 
-               'outubro': 10, 'novembro': 11, 'dezembro': 12}
-    for name, number in mapping.items():
-        if name in base_string:
-            base_string = base_string.replace(name, str(number))
-            break
-    return base_string
\ No newline at end of file
+    return [{**batch[index], '_id': _id} for index, _id in upserted_ids]
@@ -0,0 +1,74 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Shared normalization of the dates written on news query pages
+"""
+
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+MONTHS = {'janeiro': 1, 'fevereiro': 2, 'março': 3,
+          'abril': 4, 'maio': 5, 'junho': 6,
+          'julho': 7, 'agosto': 8, 'setembro': 9,
+          'outubro': 10, 'novembro': 11, 'dezembro': 12}
+
+UNITS = {'minuto': timedelta(minutes=1), 'hora': timedelta(hours=1), 'dia': timedelta(days=1),
+         'semana': timedelta(weeks=1), 'mes': timedelta(days=30), 'mês': timedelta(days=30),
+         'ano': timedelta(days=365)}
+
+# 'há 3 horas', 'Há 2 semanas', 'há 1 mês'
+RELATIVE_PATTERN = re.compile(r'(\d+)\s+(minuto|hora|dia|semana|mes|mês|ano)', re.IGNORECASE)
+# '03/04/2021 14h35' (G1 and UOL)
+NUMERIC_PATTERN = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})\s+(\d{1,2})h(\d{2})')
+# '3 de abril de 2021 | 14h35' (Estadao)
+WRITTEN_PATTERN = re.compile(r'(\d{1,2}) de (\w+) de (\d{4})\s*\|\s*(\d{1,2})h(\d{2})', re.IGNORECASE)
+
+@lru_cache(maxsize=4096)
+def parse_date_string(date_string):
+    """Parses a date string of a query page, independently of the moment it is read
+
+    Args:
+        date_string (string): Date as written on the page
+
+    Returns:
+        datetime.datetime | datetime.timedelta: Absolute datetime, or how long before the
+        reference time a relative date ('há 3 horas', 'Ontem') is
+
+    Raises:
+        ValueError: If the date string has no known format
+    """
+
+    matched = NUMERIC_PATTERN.search(date_string)
+    if matched:
+        day, month, year, hour, minute = map(int, matched.groups())
+        return datetime(year, month, day, hour, minute)
+    matched = WRITTEN_PATTERN.search(date_string)
+    if matched and matched[2].lower() in MONTHS:
+        return datetime(int(matched[3]), MONTHS[matched[2].lower()], int(matched[1]),
+                        int(matched[4]), int(matched[5]))
+    matched = RELATIVE_PATTERN.search(date_string)
+    if matched:
+        return int(matched[1]) * UNITS[matched[2].lower()]
+    if date_string.strip().lower() == 'ontem':
+        return UNITS['dia']
+    raise ValueError(f'Unknown date format: {date_string!r}')
+
+def normalize_dates(date_strings, reference=None):
+    """Parses the date strings of a whole page against a single reference time
+
+    Args:
+        date_strings (list of string): Dates as written on the page
+        reference (datetime.datetime): Moment relative dates refer to (default: now)
+
+    Returns:
+        list of datetime.datetime: Datetime of each date string
+    """
+
+    reference = reference or datetime.now()
+    dates = []
+    for date_string in date_strings:
+        parsed = parse_date_string(date_string)
+        dates.append(reference - parsed if isinstance(parsed, timedelta) else parsed)
+    return dates
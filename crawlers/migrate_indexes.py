@@ -0,0 +1,106 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Migration that builds deduplication indexes on existing raw collections
+"""
+
+import argparse
+from pymongo import UpdateOne
+from crawlers_common import DEFAULT_BATCH_SIZE
+from crawlers_common import ensure_indexes
+from crawlers_common import mongo_database
+from crawlers_common import title_hash
+
+# Keyed by exact title (see loaders/loader_kaggle_datasets.py), so not migrated by default
+EXCLUDED_COLLECTIONS = ['raw_Kaggle']
+
+def backfill_title_hashes(collection, batch_size):
+    """Sets the normalized title hash of documents stored before it existed
+  
+    Args:
+        collection (pymongo.collection.Collection): MongoDB collection targered
+        batch_size (int): Number of updates sent per bulk write
+
+    Returns:
+        int: Number of updated documents
+    """
+
+    updated = 0
+    updates = []
+    for doc in collection.find({'title_hash': {'$exists': False}}, {'title': 1}, batch_size=batch_size):
+        updates.append(UpdateOne({'_id': doc['_id']}, {'$set': {'title_hash': title_hash(doc.get('title'))}}))
+        if len(updates) >= batch_size:
+            updated += collection.bulk_write(updates, ordered=False).modified_count
+            updates = []
+    if updates:
+        updated += collection.bulk_write(updates, ordered=False).modified_count
+    return updated
+
+def duplicated_ids(collection, field):
+    """Gets IDs of documents repeating a value of field, except the first stored one
+  
+    Args:
+        collection (pymongo.collection.Collection): MongoDB collection targered
+        field (string): Field that must be unique
+
+    Returns:
+        list of bson.ObjectId: IDs of duplicated documents
+    """
+
+    pipeline = [{'$match': {field: {'$type': 'string'}}},
+                {'$sort': {'_id': 1}},
+                {'$group': {'_id': '$' + field, 'ids': {'$push': '$_id'}, 'count': {'$sum': 1}}},
+                {'$match': {'count': {'$gt': 1}}}]
+    ids = []
+    for group in collection.aggregate(pipeline, allowDiskUse=True):
+        ids.extend(group['ids'][1:])
+    return ids
+
+def migrate(collection, dry_run=False, batch_size=DEFAULT_BATCH_SIZE):
+    """Backfills title hashes, removes duplicates and builds indexes of collection
+  
+    Args:
+        collection (pymongo.collection.Collection): MongoDB collection targered
+        dry_run (bool): If True, only reports what would be changed
+        batch_size (int): Number of updates sent per bulk write
+
+    Returns:
+        Nothing
+
+    Raises:
+        ValueError: If collection is keyed by exact title (title_unique index), like raw_Kaggle
+    """
+
+    if 'title_unique' in collection.index_information():
+        raise ValueError(f'{collection.name} is keyed by exact title (title_unique index), '
+                         'title hash deduplication would drop the registries it keeps')
+    if dry_run:
+        missing = collection.count_documents({'title_hash': {'$exists': False}})
+        print(f'{collection.name}: {missing} documents without title hash')
+        return
+    updated = backfill_title_hashes(collection, batch_size)
+    duplicates = set(duplicated_ids(collection, 'title_hash'))
+    duplicates.update(duplicated_ids(collection, 'link'))
+    removed = collection.delete_many({'_id': {'$in': list(duplicates)}}).deleted_count if duplicates else 0
+    ensure_indexes(collection)
+    print(f'{collection.name}: {updated} title hashes set, {removed} duplicates removed, indexes built')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Builds deduplication indexes on raw collections')
+    parser.add_argument('collections', nargs='*', help='Collections to migrate (default: all raw_* except '
+                        + ', '.join(EXCLUDED_COLLECTIONS) + ')')
+    parser.add_argument('--dry-run', action='store_true', help='Only report documents to migrate')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = mongo_database()
+    names = args.collections or sorted(n for n in db.list_collection_names()
+                                       if n.startswith('raw_') and n not in EXCLUDED_COLLECTIONS)
+    for name in names:
+        try:
+            migrate(db[name], args.dry_run, args.batch_size)
+        except ValueError as error:
+            print(f'Skipped {name}: {error}')
+
+    print('Execution finished')
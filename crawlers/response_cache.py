@@ -0,0 +1,224 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: On-disk HTTP response cache for crawler pages, with offline replay
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import threading
+from email.utils import formatdate
+
+DEFAULT_TTL = 7*24*60*60            # seconds an entry is kept after its last validation
+DEFAULT_MAX_SIZE = 1024*1024*1024   # bytes of compressed bodies kept on disk
+
+class ResponseCache:
+    """Content-addressed cache of response bodies, indexed by URI
+
+    Each URI has a small JSON entry (validators and timestamps) pointing to a gzip
+    compressed body named by the hash of its content, so identical pages are stored
+    once. Stale entries are revalidated with If-None-Match/If-Modified-Since, entries
+    not validated within ttl are dropped and the least recently used bodies are
+    evicted when the cache grows beyond max_size. In offline mode responses are only
+    replayed from the cache and nothing is requested.
+
+    Args:
+        directory (string): Directory of the cache (created if missing)
+        fresh_for (int): Seconds an entry is served without revalidation
+        ttl (int): Seconds an entry is kept after its last validation
+        max_size (int): Maximum bytes of compressed bodies
+        offline (bool): If True, never reach the network
+    """
+
+    def __init__(self, directory, fresh_for=0, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE, offline=False):
+        self.directory = directory
+        self.fresh_for = fresh_for
+        self.ttl = ttl
+        self.max_size = max_size
+        self.offline = offline
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, 'entries'), exist_ok=True)
+        os.makedirs(os.path.join(directory, 'bodies'), exist_ok=True)
+        self._size = sum(os.path.getsize(p) for p in self._files('bodies'))
+
+    @classmethod
+    def from_environment(cls):
+        """Creates the cache configured by CRAWLER_CACHE_DIR and CRAWLER_CACHE_OFFLINE variables
+
+        Returns:
+            ResponseCache: Configured cache | None if CRAWLER_CACHE_DIR is not set
+        """
+
+        directory = os.environ.get('CRAWLER_CACHE_DIR')
+        if not directory:
+            return None
+        offline = os.environ.get('CRAWLER_CACHE_OFFLINE', '') not in ('', '0')
+        return cls(directory, offline=offline)
+
+    def cached(self, uri):
+        """Gets the body of URI if it can be used without requesting it
+
+        Args:
+            uri (string): Full URI
+
+        Returns:
+            string: Cached body | None if missing or must be revalidated
+        """
+
+        entry = self._entry(uri)
+        if entry and (self.offline or time.time() - entry['validated_at'] < self.fresh_for):
+            return self._read(uri, entry)
+        return None
+
+    def conditional_headers(self, uri):
+        """Gets the revalidation headers of the cached response of URI
+
+        Args:
+            uri (string): Full URI
+
+        Returns:
+            dictionary: If-None-Match and If-Modified-Since headers (empty if not cached)
+        """
+
+        entry = self._entry(uri)
+        if not entry:
+            return {}
+        headers = {'If-Modified-Since': entry.get('last_modified') or formatdate(entry['stored_at'], usegmt=True)}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        return headers
+
+    def update(self, uri, status, text, headers):
+        """Stores a fresh response or renews a revalidated one
+
+        Args:
+            uri (string): Full URI
+            status (int): HTTP status code of response
+            text (string): Body of response
+            headers (mapping): Headers of response
+
+        Returns:
+            string: Body to use for the URI (the cached one if status is 304)
+        """
+
+        if status == 304:
+            entry = self._entry(uri)
+            if entry:
+                entry['validated_at'] = time.time()
+                self._write_entry(uri, entry)
+                cached = self._read(uri, entry)
+                if cached is not None:
+                    return cached
+            return text
+        if status == 200:
+            self._store(uri, text, headers)
+        return text
+
+    def items(self, uri_prefix=''):
+        """Replays cached responses, e.g. for re-running scrap functions offline
+
+        Args:
+            uri_prefix (string): Only replays URIs starting with this prefix
+
+        Returns:
+            generator of tuple: (URI, body) of each cached response
+        """
+
+        for path in self._files('entries'):
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if entry['uri'].startswith(uri_prefix):
+                text = self._read(entry['uri'], entry)
+                if text is not None:
+                    yield entry['uri'], text
+
+    def evict(self):
+        """Removes expired entries, then least recently used bodies while cache is too big"""
+
+        now = time.time()
+        referenced = set()
+        for path in self._files('entries'):
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if now - entry['validated_at'] > self.ttl:
+                self._remove(path)
+            else:
+                referenced.add(entry['body'])
+        bodies = sorted(self._files('bodies'), key=os.path.getmtime)
+        for path in bodies:
+            if os.path.basename(path)[:-3] not in referenced or self._size > self.max_size:
+                self._remove(path, body=True)
+
+    def _key(self, uri):
+        return hashlib.sha256(uri.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, uri):
+        return os.path.join(self.directory, 'entries', self._key(uri) + '.json')
+
+    def _body_path(self, digest):
+        return os.path.join(self.directory, 'bodies', digest + '.gz')
+
+    def _files(self, kind):
+        folder = os.path.join(self.directory, kind)
+        return [os.path.join(folder, name) for name in os.listdir(folder) if not name.endswith('.tmp')]
+
+    def _entry(self, uri):
+        path = self._entry_path(uri)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry['validated_at'] > self.ttl and not self.offline:
+            self._remove(path)
+            return None
+        return entry
+
+    def _read(self, uri, entry):
+        path = self._body_path(entry['body'])
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                text = f.read()
+        except OSError:
+            self._remove(self._entry_path(uri))
+            return None
+        os.utime(path)   # mark as recently used
+        return text
+
+    def _store(self, uri, text, headers):
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._body_path(digest)
+        if not os.path.exists(path):
+            self._write_atomic(path, gzip.compress(data))
+            with self._lock:
+                self._size += os.path.getsize(path)
+        now = time.time()
+        self._write_entry(uri, {'uri': uri, 'body': digest, 'etag': headers.get('ETag'),
+                                'last_modified': headers.get('Last-Modified'),
+                                'stored_at': now, 'validated_at': now})
+        if self._size > self.max_size:
+            self.evict()
+
+    def _write_entry(self, uri, entry):
+        self._write_atomic(self._entry_path(uri), json.dumps(entry).encode('utf-8'))
+
+    def _write_atomic(self, path, data):
+        temporary = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+    def _remove(self, path, body=False):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        if body:
+            with self._lock:
+                self._size -= size
@@ -0,0 +1,198 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Scores news as soon as crawlers store them, sending likely fake news to alert sinks
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import threading
+from datetime import datetime
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+from requests import RequestException
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'modeling'))
+from crawlers_common import HTTP_SESSION
+from crawlers_common import INSERT_LISTENERS
+from crawlers_common import mongo_collection
+from predictor import Predictor
+
+DEFAULT_THRESHOLD = 0.9      # probability from which a news is sent to the alert sinks
+DEFAULT_MAX_BATCH = 512      # news scored together
+DEFAULT_MAX_WAIT = 0.5       # seconds the first news of a batch waits for others
+
+class FileSink:
+    """Appends alerts to a JSON lines file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, alerts):
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            for alert in alerts:
+                f.write(json.dumps(alert, default=str, ensure_ascii=False) + '\n')
+
+class MongoSink:
+    """Inserts alerts into a collection, which consumers can follow with a change stream (collection.watch())"""
+
+    def __init__(self, collection='alerts'):
+        self.collection = mongo_collection(collection)
+
+    def send(self, alerts):
+        self.collection.insert_many([dict(alert) for alert in alerts], ordered=False)
+
+class WebhookSink:
+    """Posts alerts as JSON to an HTTP endpoint (a stand-in for chat or incident tools)"""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alerts):
+        HTTP_SESSION.post(self.url, data=json.dumps({'alerts': alerts}, default=str), timeout=self.timeout,
+                          headers={'Content-Type': 'application/json'}).raise_for_status()
+
+class StreamScorer:
+    """Scores the news inserted by BulkWriter of raw collections in a background thread
+
+    While started, it is registered in INSERT_LISTENERS, so each flush of a crawler
+    hands over its new documents without waiting for them to be scored. Documents
+    are grouped into batches (up to max_batch, waiting at most max_wait for more),
+    scored by the predictor, updated in their raw collection with fake_probability,
+    model_version and scored_at, and those scored at least threshold are sent to
+    every sink.
+
+    Args:
+        predictor (predictor.Predictor): Loaded pipeline
+        sinks (list): Objects with a send(alerts) method
+        threshold (float): Probability from which a news is sent to the sinks
+        max_batch (int): Maximum news of a batch
+        max_wait (float): Seconds the first news of a batch waits for more
+    """
+
+    def __init__(self, predictor, sinks=(), threshold=DEFAULT_THRESHOLD, max_batch=DEFAULT_MAX_BATCH,
+                 max_wait=DEFAULT_MAX_WAIT):
+        self.predictor = predictor
+        self.sinks = list(sinks)
+        self.threshold = threshold
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.scored = 0
+        self.alerted = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self):
+        """Loads the models and starts listening to inserted documents"""
+
+        self.predictor.predict_proba(['warm up'])
+        self._thread.start()
+        INSERT_LISTENERS.append(self.listen)
+        return self
+
+    def listen(self, collection, documents):
+        """Queues the documents inserted into a raw collection (called by BulkWriter)"""
+
+        if collection.startswith('raw_'):
+            for document in documents:
+                self._queue.put((collection, document))
+
+    def close(self):
+        """Stops listening and scores the queued documents"""
+
+        if self.listen in INSERT_LISTENERS:
+            INSERT_LISTENERS.remove(self.listen)
+        self._queue.put(None)
+        self._thread.join()
+        print(f'Scored {self.scored} new documents, {self.alerted} alerts sent')
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self.score(batch)
+            except Exception as error:
+                print(f'Failed to score batch of {len(batch)} documents: {error!r}')
+
+    def score(self, batch):
+        """Scores a batch of inserted documents, stores their scores and sends alerts
+
+        Args:
+            batch (list of tuple): (name of raw collection, inserted document)
+
+        Returns:
+            Nothing
+        """
+
+        origins = [collection[len('raw_'):] for collection, _ in batch]
+        probabilities = self.predictor.predict_proba([d.get('title') or '' for _, d in batch], origins)
+        now = datetime.now()
+        updates = {}
+        for (collection, document), probability in zip(batch, probabilities.tolist()):
+            updates.setdefault(collection, []).append(
+                UpdateOne({'_id': document['_id']}, {'$set': {'fake_probability': probability, 'scored_at': now,
+                                                              'model_version': self.predictor.version}}))
+        for collection, requests in updates.items():
+            try:
+                mongo_collection(collection).bulk_write(requests, ordered=False)
+            except PyMongoError as error:
+                print(f'Failed to write scores into {collection} collection: {error}')
+        self.scored += len(batch)
+        alerts = [{'news_id': str(document['_id']), 'origin': origin, 'title': document.get('title'),
+                   'link': document.get('link'), 'datetime': document.get('datetime'),
+                   'fake_probability': probability, 'model_version': self.predictor.version, 'scored_at': now}
+                  for (_, document), origin, probability in zip(batch, origins, probabilities.tolist())
+                  if probability >= self.threshold]
+        if not alerts:
+            return
+        self.alerted += len(alerts)
+        for sink in self.sinks:
+            try:
+                sink.send(alerts)
+            except (OSError, PyMongoError, RequestException) as error:
+                print(f'Failed to send {len(alerts)} alerts to {sink.__class__.__name__}: {error}')
+
+def load_scorer(model, threshold=DEFAULT_THRESHOLD, alert_file=None, alert_collection=None, webhook=None):
+    """Builds a StreamScorer for a bundle and the chosen alert sinks
+
+    Args:
+        model (string): Bundle saved by train.py --save
+        threshold (float): Probability from which a news is sent to the sinks
+        alert_file (string): JSON lines file of alerts | None
+        alert_collection (string): Collection of alerts | None
+        webhook (string): URL receiving alerts | None
+
+    Returns:
+        StreamScorer: Scorer (not started)
+    """
+
+    sinks = ([FileSink(alert_file)] if alert_file else []) \
+            + ([MongoSink(alert_collection)] if alert_collection else []) \
+            + ([WebhookSink(webhook)] if webhook else [])
+    return StreamScorer(Predictor.load(model), sinks, threshold)
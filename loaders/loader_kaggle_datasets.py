@@ -7,86 +7,154 @@ Description: Loader for consuming Kaggle datasets
 
 import pandas as pd
 import os
-from pymongo import MongoClient
+import sys
+import json
+import argparse
+from pymongo import UpdateOne
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'crawlers'))
+from crawlers_common import mongo_collection
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kaggle_datasets.json')
+DEFAULT_CHUNK_SIZE = 10000
+
+def load_config(config_path=DEFAULT_CONFIG):
+    """Reads the declarative description of Kaggle datasets
+
+    Each dataset maps to its title column, its label column (or a constant label per
+    file), an optional mapping of raw label values and the list of its CSV files, whose
+    paths are given as lists of folders relative to the repository root.
+
+    Args:
+        config_path (string): Path of JSON config
+
+    Returns:
+        dictionary: Description of each dataset by name
+    """
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def iter_batches(name_dataset, spec, root_path=ROOT_PATH, chunksize=DEFAULT_CHUNK_SIZE):
+    """Streams the registries of a dataset as batches of documents, one CSV chunk at a time
+
+    Only the title and label columns are read, both as strings. Registries without title
+    are skipped.
 
-def load_dataset(dataset, name_dataset, title_str, label_str):
-    """Inserts all registries of loaded dataset into MongoDB Collection
-  
     Args:
-        dataset (pandas.core.frame.DataFrame): Dataset to load
         name_dataset (string): Name string of dataset
-        title_str (string): String for identifying the title of registry in dataset
-        label_str (string): String for identifying the label of registry in dataset
+        spec (dictionary): Description of dataset (see load_config)
+        root_path (string): Folder the paths of files are relative to
+        chunksize (int): Number of CSV rows read at a time
+
+    Returns:
+        generator of list of dictionary: Documents of each chunk
+    """
+
+    title_str = spec['title']
+    label_map = spec.get('label_map', {})
+    for file_spec in spec['files']:
+        constant_label = file_spec.get('label')
+        columns = [title_str] if constant_label is not None else [title_str, spec['label']]
+        path = os.path.join(root_path, *file_spec['path'])
+        chunks = pd.read_csv(path, usecols=columns, dtype={c: str for c in columns}, chunksize=chunksize)
+        for chunk in chunks:
+            chunk = chunk.dropna(subset=[title_str])
+            titles = chunk[title_str].tolist()
+            if constant_label is not None:
+                labels = [constant_label] * len(titles)
+            else:
+                labels = [label_map.get(l, l) for l in chunk[spec['label']].tolist()]
+            yield [{'title': title, 'label': label, 'origin': name_dataset}
+                   for title, label in zip(titles, labels)]
+
+def deduplicate(documents):
+    """Drops registries of a chunk with the exact title of a later one, as the treatment notebook does
+
+    Titles are compared exactly (not by title_hash), and the last registry of each
+    title is kept, like drop_duplicates(subset='title', keep="last").
+
+    Args:
+        documents (list of dictionary): Documents of a chunk, in load order
+
+    Returns:
+        tuple: (list of kept documents, number of dropped documents, number of dropped documents with another label)
+    """
+
+    kept, dropped, conflicting = {}, 0, 0
+    for document in documents:
+        previous = kept.pop(document['title'], None)
+        if previous is not None:
+            dropped += 1
+            conflicting += previous['label'] != document['label']
+        kept[document['title']] = document
+    return list(kept.values()), dropped, conflicting
+
+def load_datasets(names, config, collection, root_path=ROOT_PATH, chunksize=DEFAULT_CHUNK_SIZE):
+    """Writes the registries of datasets into MongoDB Collection, without exact title duplicates
+
+    Each CSV chunk is deduplicated and written as soon as it is read, upserting the
+    documents by title (see ensure_kaggle_indexes), so memory does not grow with the
+    datasets and the last registry of each title, in load order, is the one kept.
+
+    Args:
+        names (list of string): Names of datasets, in load order
+        config (dictionary): Description of each dataset by name (see load_config)
+        collection (pymongo.collection.Collection): Target MongoDB collection, with unique title index
+        root_path (string): Folder the paths of files are relative to
+        chunksize (int): Number of CSV rows read at a time
+
+    Returns:
+        int: Number of new documents
+    """
+
+    inserted, dropped, conflicting = 0, 0, 0
+    for name_dataset in names:
+        for documents in iter_batches(name_dataset, config[name_dataset], root_path, chunksize):
+            documents, chunk_dropped, chunk_conflicting = deduplicate(documents)
+            if not documents:
+                continue
+            result = collection.bulk_write([UpdateOne({'title': d['title']}, {'$set': d}, upsert=True)
+                                            for d in documents], ordered=False)
+            inserted += result.upserted_count
+            dropped += chunk_dropped + result.matched_count
+            conflicting += chunk_conflicting + result.modified_count
+        print(f'Finished loading of {name_dataset} dataset into {collection.name} collection')
+    print(f'{inserted} new registries, {dropped} registries replaced by a later one with the same title '
+          f'({conflicting} with another label or dataset, the last one was kept)')
+    return inserted
+
+def ensure_kaggle_indexes(collection):
+    """Makes the exact title the unique key of collection (Kaggle titles are not deduplicated by title_hash)
+
+    Args:
+        collection (pymongo.collection.Collection): MongoDB collection of Kaggle datasets
 
     Returns:
         Nothing
     """
 
-    for index, row in dataset.iterrows():
-        data = {'title': row[title_str], 'label': row[label_str], 'origin': name_dataset}
-        inserted_id = str(KAGGLE_COLLECTION.insert_one(data).inserted_id)
-        print('Inserted object ' + inserted_id + f', of {name_dataset} dataset into raw_Kaggle collection')
-    print(f'Finished loading of {name_dataset} dataset into raw_Kaggle collection')
+    if 'title_hash_unique' in collection.index_information():
+        collection.drop_index('title_hash_unique')
+    collection.create_index('title', unique=True, name='title_unique')
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Loads Kaggle datasets into the raw_Kaggle collection')
+    parser.add_argument('datasets', nargs='*', metavar='DATASET', help='Datasets to load (default: all in config)')
+    parser.add_argument('--config', default=DEFAULT_CONFIG, help='JSON description of datasets')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNK_SIZE, help='CSV rows read at a time')
+    parser.add_argument('--replace', action='store_true',
+                        help='Drops the raw_Kaggle collection before loading (e.g. if loaded with title_hash keys)')
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    unknown = set(args.datasets) - set(config)
+    if unknown:
+        parser.error('unknown datasets: ' + ', '.join(sorted(unknown)))
 
-    client = MongoClient('localhost', 27017)
-    db = client['covid-fake-news-detection']
-    KAGGLE_COLLECTION = db['raw_Kaggle']
-
-    path = str(os.path.dirname(os.path.dirname(__file__)))
-
-    # START LOADING AGHAMMADZADA DATASET
-    aghammadzada1 = pd.read_csv(path + r'\datasets\Kaggle Aghammadzada\Constraint_Train.csv')
-    aghammadzada2 = pd.read_csv(path + r'\datasets\Kaggle Aghammadzada\Constraint_Val.csv')
-    aghammadzada = pd.concat([aghammadzada1, aghammadzada2])
-    del aghammadzada1
-    del aghammadzada2
-    load_dataset(aghammadzada, 'Aghammadzada', 'tweet', 'label')
-    del aghammadzada
-    # END LOADING AGHAMMADZADA DATASET
-
-    # START LOADING ARASHNIC DATASET
-    arashnic_claimfake_1 = pd.read_csv(path + r'\datasets\Kaggle Arashnic\ClaimFakeCOVID-19_5.csv')
-    arashnic_claimfake_2 = pd.read_csv(path + r'\datasets\Kaggle Arashnic\ClaimFakeCOVID-19_7.csv')
-    arashnic_claimreal_1 = pd.read_csv(path + r'\datasets\Kaggle Arashnic\ClaimRealCOVID-19.csv')
-    arashnic_claimreal_2 = pd.read_csv(path + r'\datasets\Kaggle Arashnic\ClaimRealCOVID-19_5.csv')
-    arashnic_claimreal_3 = pd.read_csv(path + r'\datasets\Kaggle Arashnic\ClaimRealCOVID-19_7.csv')
-    arashnic_newsfake_1 = pd.read_csv(path + r'\datasets\Kaggle Arashnic\NewsFakeCOVID-19.csv')
-    arashnic_newsfake_2 = pd.read_csv(path + r'\datasets\Kaggle Arashnic\NewsFakeCOVID-19_5.csv')
-    arashnic_newsfake_3 = pd.read_csv(path + r'\datasets\Kaggle Arashnic\NewsFakeCOVID-19_7.csv')
-    arashnic_newsreal_1 = pd.read_csv(path + r'\datasets\Kaggle Arashnic\NewsRealCOVID-19.csv')
-    arashnic_newsreal_2 = pd.read_csv(path + r'\datasets\Kaggle Arashnic\NewsRealCOVID-19_5.csv')
-    arashnic_newsreal_3 = pd.read_csv(path + r'\datasets\Kaggle Arashnic\NewsRealCOVID-19_7.csv')
-    arashnic_claimfake = pd.concat([arashnic_claimfake_1, arashnic_claimfake_2])
-    arashnic_claimreal = pd.concat([arashnic_claimreal_1, arashnic_claimreal_2, arashnic_claimreal_3])
-    arashnic_newsfake = pd.concat([arashnic_newsfake_1, arashnic_newsfake_2, arashnic_newsfake_3])
-    arashnic_newsreal = pd.concat([arashnic_newsreal_1, arashnic_newsreal_2, arashnic_newsreal_3])
-    del arashnic_claimfake_1
-    del arashnic_claimfake_2
-    del arashnic_claimreal_1
-    del arashnic_claimreal_2
-    del arashnic_claimreal_3
-    del arashnic_newsfake_1
-    del arashnic_newsfake_2
-    del arashnic_newsfake_3
-    del arashnic_newsreal_1
-    del arashnic_newsreal_2
-    del arashnic_newsreal_3
-    arashnic_claimfake['label'] = 'fake'
-    arashnic_claimreal['label'] = 'real'
-    arashnic_newsfake['label'] = 'fake'
-    arashnic_newsreal['label'] = 'real'
-    arashnic = pd.concat([arashnic_claimfake, arashnic_claimreal, arashnic_newsfake, arashnic_newsreal])
-    arashnic = arashnic[['title','label']]
-    load_dataset(arashnic, 'Arashnic', 'title', 'label')
-    del arashnic
-    # END LOADING ARASHNIC DATASET
-    
-    # START LOADING BANIK DATASET
-    banik = pd.read_csv(path + r'\datasets\Kaggle Banik\COVID Fake News Data.csv')
-    banik['outcome'] = banik['outcome'].map(lambda l: 'fake' if not l else 'real')
-    load_dataset(banik, 'Banik', 'headlines', 'outcome')
-    del banik
-    # END LOADING BANIK DATASET
\ No newline at end of file
+    KAGGLE_COLLECTION = mongo_collection('raw_Kaggle')
+    if args.replace:
+        KAGGLE_COLLECTION.drop()
+    ensure_kaggle_indexes(KAGGLE_COLLECTION)
+    load_datasets(args.datasets or list(config), config, KAGGLE_COLLECTION, chunksize=args.chunksize)
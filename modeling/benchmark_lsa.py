@@ -0,0 +1,64 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Compares accuracy and cost of LSA settings against classifiers on the sparse TF-IDF matrix
+"""
+
+import argparse
+import numpy as np
+from train import cross_validate
+from train import load_data
+from train import MODELS
+from train import SPARSE_MODELS
+
+def benchmark(X_text, y, lsa_model, components_grid, n_iter_grid, sparse_models, folds, n_jobs):
+    """Cross-validates a classifier over each LSA setting and the sparse classifiers without LSA
+
+    Args:
+        X_text (numpy.ndarray): Tokenized titles
+        y (numpy.ndarray): Labels
+        lsa_model (string): Name in MODELS of classifier trained on LSA features
+        components_grid (list of int): Numbers of LSA components
+        n_iter_grid (list of int): Iterations of randomized SVD
+        sparse_models (list of string): Names in SPARSE_MODELS
+        folds (int): Number of stratified folds
+        n_jobs (int): Number of processes
+
+    Returns:
+        list of dictionary: Mean metrics and seconds of each setting
+    """
+
+    settings = [(lsa_model, MODELS[lsa_model], c, n) for c in components_grid for n in n_iter_grid]
+    settings += [(name, SPARSE_MODELS[name], 0, 0) for name in sparse_models]
+    rows = []
+    for name, classifier, components, n_iter in settings:
+        results = cross_validate(X_text, y, {name: classifier}, folds, components, n_iter, n_jobs)
+        rows.append({'model': name, 'components': components, 'n_iter': n_iter,
+                     **{m: float(np.mean([r[m] for r in results]))
+                        for m in ['f1', 'auc', 'feature_seconds', 'fit_seconds', 'predict_seconds']}})
+        r = rows[-1]
+        print(f'{name:<10}{components or "-":>11}{n_iter or "-":>8}{r["f1"]:>8.4f}{r["auc"]:>8.4f}'
+              f'{r["feature_seconds"]:>10.2f}{r["fit_seconds"]:>10.2f}{r["predict_seconds"]:>10.4f}')
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks LSA components and iterations against sparse classifiers')
+    parser.add_argument('--artifacts', help='Folder of artifact store')
+    parser.add_argument('--stage', default='balanced_retokenized_en', help='Stage with title and label columns')
+    parser.add_argument('--pickle', help='DataFrame pickle to use instead of an artifact store')
+    parser.add_argument('--model', choices=list(MODELS), default='LR', help='Classifier trained on LSA features')
+    parser.add_argument('--components', type=int, nargs='+', default=[50, 100, 200], help='LSA components to try')
+    parser.add_argument('--n-iter', type=int, nargs='+', default=[5, 10, 30, 150], help='SVD iterations to try')
+    parser.add_argument('--sparse-models', nargs='*', choices=list(SPARSE_MODELS), default=list(SPARSE_MODELS),
+                        help='Classifiers trained on the sparse TF-IDF matrix')
+    parser.add_argument('--folds', type=int, default=5, help='Number of stratified folds')
+    parser.add_argument('--jobs', type=int, default=-1, help='Parallel processes (default: all CPUs)')
+    args = parser.parse_args()
+    if args.artifacts is None and args.pickle is None:
+        parser.error('one of --artifacts or --pickle is required')
+
+    X_text, y = load_data(args.artifacts, args.stage, args.pickle)
+    print(f'{"model":<10}{"components":>11}{"n_iter":>8}{"f1":>8}{"auc":>8}{"features":>10}{"fit":>10}{"predict":>10}')
+    benchmark(X_text, y, args.model, args.components, args.n_iter, args.sparse_models, args.folds, args.jobs)
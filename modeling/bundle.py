@@ -0,0 +1,239 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Versioned model bundles (manifest and memory mappable arrays) scored with numpy
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import joblib
+import numpy as np
+from datetime import datetime
+from scipy.sparse import diags
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'preprocessing'))
+from preprocessing_common import file_hash
+
+BUNDLE_FORMAT = 'covid-fake-news-detection-bundle'
+BUNDLE_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+# Parameters of TfidfVectorizer needed to vectorize with a fixed vocabulary
+VECTORIZER_PARAMS = ['lowercase', 'token_pattern', 'ngram_range', 'strip_accents', 'stop_words', 'binary',
+                     'norm', 'use_idf', 'sublinear_tf']
+ACTIVATIONS = {'identity': lambda x: x, 'relu': lambda x: np.maximum(x, 0), 'tanh': np.tanh,
+               'logistic': lambda x: 1 / (1 + np.exp(-x))}
+
+def sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+def classifier_arrays(classifier):
+    """Describes a fitted binary classifier by arrays that numpy can score
+
+    Linear models and Naive Bayes for counts are reduced to the weights of the log
+    odds of class 1. Classifiers without a numpy form (e.g. SVC with RBF kernel or
+    KNN) are kept as a joblib file.
+
+    Args:
+        classifier (sklearn.base.ClassifierMixin): Fitted classifier with classes [0, 1]
+
+    Returns:
+        tuple: (dictionary describing classifier, dictionary of arrays by name)
+    """
+
+    if list(classifier.classes_) != [0, 1]:
+        raise ValueError(f'Expected classes [0, 1], got {list(classifier.classes_)}')
+    name = classifier.__class__.__name__
+    if name in ('LogisticRegression', 'LinearSVC', 'SGDClassifier'):
+        return {'kind': 'linear', 'class': name}, {'coef': classifier.coef_[0],
+                                                    'intercept': np.atleast_1d(classifier.intercept_)[:1]}
+    if name in ('ComplementNB', 'MultinomialNB'):
+        flp = classifier.feature_log_prob_
+        intercept = 0.0 if name == 'ComplementNB' else classifier.class_log_prior_[1] - classifier.class_log_prior_[0]
+        return {'kind': 'linear', 'class': name}, {'coef': flp[1] - flp[0], 'intercept': np.array([intercept])}
+    if name == 'GaussianNB':
+        return {'kind': 'gaussian_nb', 'class': name}, {'theta': classifier.theta_, 'var': classifier.var_,
+                                                        'class_prior': classifier.class_prior_}
+    if name == 'MLPClassifier':
+        arrays = {f'coef_{i}': c for i, c in enumerate(classifier.coefs_)}
+        arrays.update({f'intercept_{i}': b for i, b in enumerate(classifier.intercepts_)})
+        return {'kind': 'mlp', 'class': name, 'activation': classifier.activation,
+                'layers': len(classifier.coefs_)}, arrays
+    return {'kind': 'joblib', 'class': name}, {}
+
+def save_bundle(directory, vectorizer, lsa, classifier, settings):
+    """Saves a fitted pipeline as a bundle folder
+
+    Every array is a .npy file listed in the manifest with its SHA-256 hash, shape
+    and dtype. The bundle is written into a temporary folder that replaces the
+    previous bundle only when complete.
+
+    Args:
+        directory (string): Folder of bundle
+        vectorizer (sklearn.feature_extraction.text.TfidfVectorizer): Fitted vectorizer
+        lsa (sklearn.decomposition.TruncatedSVD): Fitted LSA | None
+        classifier (sklearn.base.ClassifierMixin): Fitted binary classifier
+        settings (dictionary): Preprocessing settings
+
+    Returns:
+        dictionary: Manifest of bundle
+    """
+
+    params = vectorizer.get_params()
+    if params['analyzer'] != 'word' or params['tokenizer'] is not None or params['preprocessor'] is not None:
+        raise ValueError('Only word analyzers without custom callables can be bundled')
+    description, arrays = classifier_arrays(classifier)
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    arrays = {'vocabulary': np.array(terms), 'idf': vectorizer.idf_,
+              **({'components': lsa.components_} if lsa is not None else {}),
+              **{'classifier_' + name: array for name, array in arrays.items()}}
+    temporary = f'{directory}.{os.getpid()}.tmp'
+    shutil.rmtree(temporary, ignore_errors=True)
+    os.makedirs(temporary)
+    files = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        np.save(os.path.join(temporary, name + '.npy'), array)
+        files[name] = {'path': name + '.npy', 'sha256': file_hash(os.path.join(temporary, name + '.npy')),
+                       'shape': list(array.shape), 'dtype': str(array.dtype)}
+    if description['kind'] == 'joblib':
+        joblib.dump(classifier, os.path.join(temporary, 'classifier.joblib'))
+        files['classifier'] = {'path': 'classifier.joblib',
+                               'sha256': file_hash(os.path.join(temporary, 'classifier.joblib'))}
+    manifest = {'format': BUNDLE_FORMAT, 'version': BUNDLE_VERSION, 'created_at': datetime.now().isoformat(),
+                'settings': settings,
+                'vectorizer': {p: list(params[p]) if isinstance(params[p], (tuple, frozenset, set)) else params[p]
+                               for p in VECTORIZER_PARAMS},
+                'lsa': lsa is not None, 'classifier': description, 'files': files}
+    with open(os.path.join(temporary, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    previous = f'{directory}.{os.getpid()}.old'
+    if os.path.exists(directory):
+        os.replace(directory, previous)
+    os.replace(temporary, directory)
+    shutil.rmtree(previous, ignore_errors=True)
+    return manifest
+
+class Bundle:
+    """Loaded model bundle, scoring tokenized headlines with numpy and scipy
+
+    Arrays are memory mapped (read-only), so loading takes milliseconds and processes
+    loading the same bundle share its pages through the page cache.
+
+    Args:
+        directory (string): Folder of bundle
+        mmap (bool): If True, memory maps the arrays instead of reading them
+        verify (bool): If True, checks the hash of every file
+
+    Raises:
+        ValueError: If folder is not a bundle of a supported version, or a file does not match its hash
+    """
+
+    def __init__(self, directory, mmap=True, verify=False):
+        with open(os.path.join(directory, MANIFEST_NAME), 'rb') as f:
+            content = f.read()
+        self.manifest = json.loads(content)
+        self.version = hashlib.sha256(content).hexdigest()[:16]   # identifies the model in scored documents
+        if self.manifest.get('format') != BUNDLE_FORMAT or self.manifest.get('version') != BUNDLE_VERSION:
+            raise ValueError(f'{directory} is not a bundle of version {BUNDLE_VERSION}')
+        self.directory = directory
+        self.settings = self.manifest['settings']
+        files = self.manifest['files']
+        if verify:
+            for name, entry in files.items():
+                if file_hash(os.path.join(directory, entry['path'])) != entry['sha256']:
+                    raise ValueError(f'File {entry["path"]} of bundle {directory} does not match its hash')
+        self.arrays = {name: np.load(os.path.join(directory, entry['path']), mmap_mode='r' if mmap else None)
+                       for name, entry in files.items() if entry['path'].endswith('.npy')}
+        params = self.manifest['vectorizer']
+        self.counter = CountVectorizer(vocabulary={t: i for i, t in enumerate(self.arrays['vocabulary'].tolist())},
+                                       lowercase=params['lowercase'], token_pattern=params['token_pattern'],
+                                       ngram_range=tuple(params['ngram_range']), strip_accents=params['strip_accents'],
+                                       stop_words=params['stop_words'], binary=params['binary'])
+        self.classifier = None
+        if self.manifest['classifier']['kind'] == 'joblib':
+            self.classifier = joblib.load(os.path.join(directory, files['classifier']['path']))
+
+    def features(self, tokens):
+        """Gets the TF-IDF (and LSA, if bundled) features of tokenized headlines
+
+        Args:
+            tokens (list of string): Stems of each headline joined by spaces
+
+        Returns:
+            scipy.sparse.csr_matrix | numpy.ndarray: Features of headlines
+        """
+
+        params = self.manifest['vectorizer']
+        X = self.counter.transform(tokens).astype(np.float64)
+        if params['sublinear_tf']:
+            np.log(X.data, X.data)
+            X.data += 1
+        if params['use_idf']:
+            X = X @ diags(np.asarray(self.arrays['idf']))
+        if params['norm']:
+            X = normalize(X, norm=params['norm'], copy=False)
+        if self.manifest['lsa']:
+            X = np.asarray(X @ self.arrays['components'].T)
+        return X
+
+    def predict_features(self, X):
+        """Gets the probability of class 1 from features
+
+        Args:
+            X (scipy.sparse.csr_matrix | numpy.ndarray): Features of headlines
+
+        Returns:
+            numpy.ndarray: Probabilities of class 1
+        """
+
+        kind, a = self.manifest['classifier']['kind'], self.arrays
+        if kind == 'linear':
+            return sigmoid(np.asarray(X @ a['classifier_coef']).ravel() + a['classifier_intercept'][0])
+        if kind == 'gaussian_nb':
+            X = np.asarray(X)
+            theta, var = a['classifier_theta'], a['classifier_var']
+            jll = np.log(a['classifier_class_prior']) - 0.5 * np.sum(np.log(2 * np.pi * var), axis=1) \
+                  - 0.5 * (((X[:, None, :] - theta) ** 2) / var).sum(axis=2)
+            return sigmoid(jll[:, 1] - jll[:, 0])
+        if kind == 'mlp':
+            layers, activation = self.manifest['classifier']['layers'], ACTIVATIONS[self.manifest['classifier']['activation']]
+            for i in range(layers):
+                X = np.asarray(X @ a[f'classifier_coef_{i}']) + a[f'classifier_intercept_{i}']
+                if i < layers - 1:
+                    X = activation(X)
+            return sigmoid(X.ravel())
+        if hasattr(self.classifier, 'predict_proba'):
+            return self.classifier.predict_proba(X)[:, 1]
+        return sigmoid(self.classifier.decision_function(X))
+
+    def predict_tokens(self, tokens):
+        """Gets the probability of being fake news of tokenized headlines
+
+        Args:
+            tokens (list of string): Stems of each headline joined by spaces
+
+        Returns:
+            numpy.ndarray: Probabilities of class 1
+        """
+
+        if not len(tokens):
+            return np.empty(0)
+        return self.predict_features(self.features(tokens))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Shows and verifies a model bundle')
+    parser.add_argument('directory', help='Folder of bundle')
+    args = parser.parse_args()
+
+    bundle = Bundle(args.directory, verify=True)
+    manifest = bundle.manifest
+    print(f'Bundle version {manifest["version"]} created at {manifest["created_at"]}: '
+          f'{manifest["classifier"]["class"]} ({manifest["classifier"]["kind"]}), '
+          f'{len(bundle.arrays["vocabulary"])} terms, LSA: {manifest["lsa"]}, hashes verified')
@@ -0,0 +1,187 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Online classifier over hashed features, updated with the new processed headlines
+"""
+
+import os
+import sys
+import argparse
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'crawlers'))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'preprocessing'))
+from crawlers_common import mongo_collection
+from preprocessing_common import SOURCES
+
+DEFAULT_N_FEATURES = 2**20
+DEFAULT_BATCH_SIZE = 1000
+CLASSES = np.array([0, 1])
+
+class OnlineModel:
+    """Logistic regression trained by SGD over hashed token counts
+
+    The hashing vectorizer has no vocabulary, so features of new headlines need no
+    refit and memory does not grow with the corpus. The model keeps the processed_at
+    and _id of the last processed document read from each origin, and is saved with
+    them in a single file, so an update resumes exactly where the saved model stopped.
+
+    Args:
+        n_features (int): Number of hashed features
+        alpha (float): Regularization of SGDClassifier
+    """
+
+    def __init__(self, n_features=DEFAULT_N_FEATURES, alpha=1e-5):
+        self.vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, norm='l2')
+        self.classifier = SGDClassifier(loss='log_loss', alpha=alpha, random_state=0)
+        self.watermarks = {}
+        self.seen = 0
+
+    @classmethod
+    def load(cls, path):
+        """Loads a saved model
+
+        Args:
+            path (string): Path of model file
+
+        Returns:
+            OnlineModel: Saved model
+        """
+
+        state = joblib.load(path)
+        model = cls(state['n_features'])
+        model.classifier = state['classifier']
+        model.watermarks = state['watermarks']
+        model.seen = state['seen']
+        return model
+
+    def save(self, path):
+        """Saves the model, replacing the previous file only when it is fully written
+
+        Args:
+            path (string): Path of model file
+
+        Returns:
+            Nothing
+        """
+
+        temporary = f'{path}.{os.getpid()}.tmp'
+        joblib.dump({'n_features': self.vectorizer.n_features, 'classifier': self.classifier,
+                     'watermarks': self.watermarks, 'seen': self.seen}, temporary)
+        os.replace(temporary, path)
+
+    def partial_fit(self, texts, labels):
+        """Updates the model with a mini-batch
+
+        Args:
+            texts (list of string): Tokenized titles
+            labels (list of int): Labels (1 for fake news)
+
+        Returns:
+            OnlineModel: Updated model
+        """
+
+        self.classifier.partial_fit(self.vectorizer.transform(texts), labels, classes=CLASSES)
+        self.seen += len(texts)
+        return self
+
+    def predict_proba(self, texts):
+        """Gets the probability of being fake news of each tokenized title
+
+        Args:
+            texts (list of string): Tokenized titles
+
+        Returns:
+            numpy.ndarray: Probabilities of class 1
+        """
+
+        return self.classifier.predict_proba(self.vectorizer.transform(texts))[:, 1]
+
+def iter_processed(origin, watermark, batch_size=DEFAULT_BATCH_SIZE):
+    """Streams the kept processed documents of an origin written after the last one learned
+
+    Documents are read by (processed_at, _id), so documents processed after the
+    watermark are found whatever their _id is.
+
+    Args:
+        origin (string): Name of source in SOURCES
+        watermark (tuple): (processed_at, _id) of last learned document | None for all
+        batch_size (int): Number of documents of each batch
+
+    Returns:
+        generator of list of dictionary: Documents with _id, processed_at, tokens and label, by ascending watermark
+    """
+
+    query = {'origin': origin, 'kept': True}
+    if watermark is not None:
+        processed_at, last_id = watermark
+        query['$or'] = [{'processed_at': {'$gt': processed_at}}, {'processed_at': processed_at, '_id': {'$gt': last_id}}]
+    cursor = mongo_collection('processed').find(query, {'processed_at': 1, 'tokens': 1, 'label': 1}) \
+                                          .sort([('processed_at', 1), ('_id', 1)]).batch_size(batch_size)
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def update(model, origins=None, batch_size=DEFAULT_BATCH_SIZE, path=None):
+    """Learns the processed documents added since the last update, in mini-batches mixing origins
+
+    Origins have a single label each, so every mini-batch takes an equal share of
+    documents from each origin with documents left, shuffled together, and SGD steps
+    see both labels instead of drifting towards the label of one origin. Watermarks
+    of the origins are advanced only after the mini-batch is learned.
+
+    Args:
+        model (OnlineModel): Model to update
+        origins (iterable of string): Names of sources in SOURCES | None for all
+        batch_size (int): Number of documents of each mini-batch
+        path (string): If given, the model is saved after each mini-batch
+
+    Returns:
+        int: Number of documents learned
+    """
+
+    origins = list(origins or SOURCES)
+    share = max(batch_size // len(origins), 1)
+    streams = {o: iter_processed(o, model.watermarks.get(o), share) for o in origins}
+    rng = np.random.default_rng(model.seen)
+    count = 0
+    while streams:
+        batches = {}
+        for origin, stream in list(streams.items()):
+            batch = next(stream, None)
+            if batch is None:
+                del streams[origin]
+            else:
+                batches[origin] = batch
+        if not batches:
+            break
+        documents = [d for batch in batches.values() for d in batch]
+        order = rng.permutation(len(documents))
+        model.partial_fit([documents[i]['tokens'] for i in order], [documents[i]['label'] for i in order])
+        for origin, batch in batches.items():
+            model.watermarks[origin] = (batch[-1]['processed_at'], batch[-1]['_id'])
+        count += len(documents)
+        if path is not None:
+            model.save(path)
+    print(f'Learned {count} new documents ({model.seen} in total)')
+    return count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Updates the online model with the new processed headlines')
+    parser.add_argument('model', help='Path of model file (created if missing)')
+    parser.add_argument('--origin', dest='origins', action='append', choices=list(SOURCES), help='Origin to learn (repeatable)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Documents per mini-batch')
+    parser.add_argument('--n-features', type=int, default=DEFAULT_N_FEATURES, help='Hashed features of a new model')
+    args = parser.parse_args()
+
+    model = OnlineModel.load(args.model) if os.path.exists(args.model) else OnlineModel(args.n_features)
+    update(model, args.origins, args.batch_size, args.model)
@@ -0,0 +1,140 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Trained pipeline (preprocessing, TF-IDF, LSA and classifier) used for scoring headlines
+"""
+
+import os
+import sys
+import joblib
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'preprocessing'))
+from preprocess import preprocess_titles
+from tokenizing import BatchTokenizer
+from tokenizing import DEFAULT_MODEL
+from preprocessing_common import file_hash
+from bundle import Bundle
+from bundle import save_bundle
+
+DEFAULT_SETTINGS = {'spacy_model': DEFAULT_MODEL, 'language': 'english', 'correct': False}
+
+def save_pipeline(path, vectorizer, lsa, classifier, settings=None):
+    """Saves a fitted pipeline as a bundle, with the preprocessing settings it was trained with
+
+    Args:
+        path (string): Folder of bundle
+        vectorizer (sklearn.feature_extraction.text.TfidfVectorizer): Fitted vectorizer
+        lsa (sklearn.decomposition.TruncatedSVD): Fitted LSA | None if classifier takes TF-IDF features
+        classifier (sklearn.base.ClassifierMixin): Fitted classifier
+        settings (dictionary): Preprocessing settings (default: DEFAULT_SETTINGS)
+
+    Returns:
+        dictionary: Manifest of bundle
+    """
+
+    return save_bundle(path, vectorizer, lsa, classifier, {**DEFAULT_SETTINGS, **(settings or {})})
+
+class Pipeline:
+    """Fitted sklearn objects of a pipeline saved by joblib before bundles existed"""
+
+    def __init__(self, vectorizer, lsa, classifier):
+        self.vectorizer = vectorizer
+        self.lsa = lsa
+        self.classifier = classifier
+
+    def predict_tokens(self, tokens):
+        if not len(tokens):
+            return np.empty(0)
+        X = self.vectorizer.transform(tokens)
+        if self.lsa is not None:
+            X = self.lsa.transform(X)
+        if hasattr(self.classifier, 'predict_proba'):
+            return self.classifier.predict_proba(X)[:, 1]
+        return 1 / (1 + np.exp(-self.classifier.decision_function(X)))
+
+class Predictor:
+    """Scores raw headlines with a trained pipeline
+
+    Headlines are cleaned (in this process) and tokenized as in the treatment stage,
+    then vectorized, reduced and classified as whole arrays.
+
+    Args:
+        model (bundle.Bundle): Loaded bundle (or any object with predict_tokens)
+        settings (dictionary): Preprocessing settings
+        version (string): Identifier of the model, written with the scores it gives | None
+    """
+
+    def __init__(self, model, settings, version=None):
+        self.model = model
+        self.settings = settings
+        self.version = version
+        self._tokenizer = None
+
+    @classmethod
+    def load(cls, path, verify=False):
+        """Loads a bundle saved by save_pipeline (or a legacy joblib pipeline file)
+
+        Args:
+            path (string): Folder of bundle | path of (trusted) joblib pipeline file
+            verify (bool): If True, checks the hashes of the bundle files
+
+        Returns:
+            Predictor: Loaded pipeline
+        """
+
+        if os.path.isdir(path):
+            bundle = Bundle(path, verify=verify)
+            return cls(bundle, bundle.settings, bundle.version)
+        pipeline = joblib.load(path)
+        return cls(Pipeline(pipeline['vectorizer'], pipeline['lsa'], pipeline['classifier']),
+                   {**DEFAULT_SETTINGS, **pipeline['settings']}, file_hash(path)[:16])
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = BatchTokenizer(self.settings['spacy_model'], self.settings['language'])
+        return self._tokenizer
+
+    def tokenize(self, titles, origins=None):
+        """Cleans and tokenizes raw headlines
+
+        Args:
+            titles (list of string): Raw headlines
+            origins (list of string): Origin of each headline (e.g. 'Kaggle' for tweets) | None
+
+        Returns:
+            list of string: Stems of each headline joined by spaces
+        """
+
+        titles = pd.Series(titles, dtype=object).str.replace("'", '', regex=False) \
+                   .str.replace('"', '', regex=False).str.replace('\n', '', regex=False)
+        origins = pd.Series(origins if origins is not None else [''] * len(titles), index=titles.index)
+        _, tokens = preprocess_titles(titles, origins, self.tokenizer, correct=self.settings['correct'], workers=0)
+        return tokens
+
+    def predict_tokens(self, tokens):
+        """Gets the probability of being fake news of tokenized headlines
+
+        Args:
+            tokens (list of string): Stems of each headline joined by spaces
+
+        Returns:
+            numpy.ndarray: Probabilities of class 1
+        """
+
+        return self.model.predict_tokens(tokens)
+
+    def predict_proba(self, titles, origins=None):
+        """Gets the probability of being fake news of raw headlines
+
+        Args:
+            titles (list of string): Raw headlines
+            origins (list of string): Origin of each headline | None
+
+        Returns:
+            numpy.ndarray: Probabilities of class 1
+        """
+
+        return self.predict_tokens(self.tokenize(titles, origins)) if len(titles) else np.empty(0)
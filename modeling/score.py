@@ -0,0 +1,144 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Batch scoring of the raw collections with a trained pipeline, resumable and run in parallel
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from pymongo import UpdateOne
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'crawlers'))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'preprocessing'))
+from crawlers_common import mongo_collection
+from preprocessing_common import SOURCES
+from predictor import Predictor
+
+DEFAULT_BATCH_SIZE = 20000   # documents read, scored and written at a time
+DEFAULT_CHUNK_SIZE = 1000    # headlines scored by a process at a time
+
+# Pipeline of each process of the pool, loaded once by load_worker
+_predictor = None
+
+def load_worker(path):
+    """Loads the pipeline in a process of the pool (bundles are memory mapped, so it is shared)"""
+
+    global _predictor
+    _predictor = Predictor.load(path)
+
+def score_chunk(titles, origin):
+    """Gets the fake news probabilities of a chunk of headlines in a process of the pool
+
+    Args:
+        titles (list of string): Raw headlines
+        origin (string): Name of source of headlines
+
+    Returns:
+        list of float: Probability of class 1 of each headline
+    """
+
+    return _predictor.predict_proba(titles, [origin] * len(titles)).tolist()
+
+def iter_unscored(source, version, batch_size=DEFAULT_BATCH_SIZE):
+    """Streams the raw documents of a source not scored by a model version
+
+    Documents are selected by their model_version, so documents inserted with any
+    _id are found, and the ones scored while the cursor runs no longer match it.
+
+    Args:
+        source (string): Name of source in SOURCES
+        version (string): Version of pipeline
+        batch_size (int): Number of documents of each batch
+
+    Returns:
+        generator of list of dictionary: Documents with _id and title
+    """
+
+    cursor = mongo_collection('raw_' + source).find({'model_version': {'$ne': version}}, {'title': 1}) \
+        .batch_size(batch_size)
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def score_source(source, version, executor, batch_size=DEFAULT_BATCH_SIZE, chunksize=DEFAULT_CHUNK_SIZE,
+                 rescore=False):
+    """Scores the raw documents of a source not yet scored by the model
+
+    Each batch is split into chunks scored by the pool, and the next batch is sent
+    to the pool before the scores of the current one are written. Documents get
+    fake_probability, model_version and scored_at fields, so an interrupted run
+    scores only the documents left and a new model version scores every document
+    again.
+
+    Args:
+        source (string): Name of source in SOURCES
+        version (string): Version of pipeline
+        executor (concurrent.futures.ProcessPoolExecutor): Pool initialized by load_worker
+        batch_size (int): Number of documents read and written at a time
+        chunksize (int): Number of headlines scored by a process at a time
+        rescore (bool): If True, scores again all documents of source, even by the same version
+
+    Returns:
+        int: Number of scored documents
+    """
+
+    collection = mongo_collection('raw_' + source)
+    if rescore:
+        collection.update_many({'model_version': version}, {'$unset': {'model_version': ''}})
+
+    def submit(documents):
+        titles = [d.get('title') or '' for d in documents]
+        return documents, [executor.submit(score_chunk, titles[i:i + chunksize], source)
+                           for i in range(0, len(titles), chunksize)]
+
+    def write(documents, futures):
+        probabilities = [p for future in futures for p in future.result()]
+        now = datetime.now()
+        collection.bulk_write([UpdateOne({'_id': d['_id']}, {'$set': {'fake_probability': p, 'model_version': version,
+                                                                       'scored_at': now}})
+                               for d, p in zip(documents, probabilities)], ordered=False)
+        return len(documents)
+
+    count = 0
+    pending = None
+    for documents in iter_unscored(source, version, batch_size):
+        submitted = submit(documents)
+        if pending is not None:
+            count += write(*pending)
+            print(f'Scored {count} documents of raw_{source} collection')
+        pending = submitted
+    if pending is not None:
+        count += write(*pending)
+        print(f'Scored {count} documents of raw_{source} collection')
+    return count
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scores the raw documents not yet scored by a model')
+    parser.add_argument('model', help='Bundle saved by train.py --save')
+    parser.add_argument('sources', nargs='*', metavar='SOURCE',
+                        help='Sources to score among ' + ', '.join(SOURCES) + ' (default: all)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Documents read and written at a time')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNK_SIZE, help='Headlines scored by a process at a time')
+    parser.add_argument('--workers', type=int, help='Scoring processes (default: number of CPUs)')
+    parser.add_argument('--rescore', action='store_true', help='Scores again every document of the sources')
+    args = parser.parse_args()
+    unknown = set(args.sources) - set(SOURCES)
+    if unknown:
+        parser.error('unknown sources: ' + ', '.join(sorted(unknown)))
+
+    version = Predictor.load(args.model, verify=True).version
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=load_worker, initargs=(args.model,)) as executor:
+        for source in args.sources or SOURCES:
+            mongo_collection('raw_' + source).create_index('model_version', name='model_version')
+            score_source(source, version, executor, args.batch_size, args.chunksize, args.rescore)
+
+    print('Execution finished')
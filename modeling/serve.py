@@ -0,0 +1,162 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: HTTP service scoring headlines, with concurrent requests grouped into micro-batches
+"""
+
+import json
+import time
+import queue
+import argparse
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from predictor import Predictor
+
+DEFAULT_MAX_BATCH = 256      # headlines scored together
+DEFAULT_MAX_WAIT = 0.002     # seconds the first request of a batch waits for others
+MAX_BODY_SIZE = 1024*1024
+
+class MicroBatcher:
+    """Groups the headlines of concurrent requests into a single prediction call
+
+    A background thread takes the first waiting request, gathers the ones arriving
+    within max_wait (up to max_batch headlines), scores all their headlines at once
+    and resolves the future of each request with its own probabilities.
+
+    Args:
+        predict (function): Scores a list of headlines, returning an array of probabilities
+        max_batch (int): Maximum headlines of a batch
+        max_wait (float): Seconds the first request of a batch waits for more requests
+    """
+
+    def __init__(self, predict, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT):
+        self.predict = predict
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, titles):
+        """Queues the headlines of a request
+
+        Args:
+            titles (list of string): Headlines
+
+        Returns:
+            concurrent.futures.Future: Resolves to the list of probabilities of headlines
+        """
+
+        future = Future()
+        self._queue.put((titles, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+                size += len(batch[-1][0])
+            titles = [title for request, _ in batch for title in request]
+            try:
+                probabilities = self.predict(titles).tolist()
+            except Exception as error:
+                for _, future in batch:
+                    future.set_exception(error)
+                continue
+            offset = 0
+            for request, future in batch:
+                future.set_result(probabilities[offset:offset + len(request)])
+                offset += len(request)
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    """Answers POST /predict with {"titles": [...]} and GET /health"""
+
+    batcher = None
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._reply(200, {'status': 'ok'})
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._reply(404, {'error': 'not found'})
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        if length > MAX_BODY_SIZE:
+            self._reply(413, {'error': 'request too large'})
+            return
+        try:
+            body = json.loads(self.rfile.read(length))
+            titles = body['titles'] if 'titles' in body else [body['title']]
+            if not isinstance(titles, list) or not all(isinstance(t, str) for t in titles):
+                raise ValueError('titles must be strings')
+        except (ValueError, KeyError, TypeError) as error:
+            self._reply(400, {'error': f'invalid request: {error}'})
+            return
+        try:
+            probabilities = self.batcher.submit(titles).result()
+        except Exception as error:
+            self._reply(500, {'error': repr(error)})
+            return
+        self._reply(200, {'probabilities': probabilities})
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve(predictor, host='127.0.0.1', port=8000, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT):
+    """Serves the predictor until interrupted
+
+    Args:
+        predictor (predictor.Predictor): Loaded pipeline
+        host (string): Address to listen on
+        port (int): Port to listen on
+        max_batch (int): Maximum headlines of a batch
+        max_wait (float): Seconds the first request of a batch waits for more requests
+
+    Returns:
+        Nothing
+    """
+
+    predictor.predict_proba(['warm up'])   # loads models before the first request
+    handler = type('Handler', (InferenceHandler,), {'batcher': MicroBatcher(predictor.predict_proba, max_batch, max_wait)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    print(f'Serving on http://{host}:{port}/predict')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serves fake news probabilities of headlines over HTTP')
+    parser.add_argument('model', help='Bundle saved by train.py --save')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH, help='Maximum headlines per batch')
+    parser.add_argument('--max-wait', type=float, default=DEFAULT_MAX_WAIT, help='Seconds to wait for a batch')
+    args = parser.parse_args()
+
+    serve(Predictor.load(args.model), args.host, args.port, args.max_batch, args.max_wait)
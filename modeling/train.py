@@ -0,0 +1,226 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Cross-validation of the classifiers, with folds and models trained in parallel
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import f1_score, precision_score, recall_score, roc_auc_score, roc_curve
+from sklearn.model_selection import StratifiedKFold
+from sklearn.naive_bayes import ComplementNB, GaussianNB
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.neural_network import MLPClassifier
+from sklearn.svm import LinearSVC, SVC
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'preprocessing'))
+from artifacts import ArtifactStore
+from predictor import save_pipeline
+from vector_index import IndexedKNNClassifier
+
+# Classifiers of analysis-rebuild notebooks, with their chosen hyperparameters
+MODELS = {'NB': GaussianNB(),
+          'LR': LogisticRegression(solver='saga', C=1000, penalty='l2', max_iter=1000),
+          'KNN': KNeighborsClassifier(n_neighbors=3),
+          'KNN-ANN': IndexedKNNClassifier(n_neighbors=3),
+          'SVM': SVC(kernel='rbf', probability=True, gamma='scale', C=100),
+          'MLP': MLPClassifier(hidden_layer_sizes=(100, 50, 50, 25), activation='relu', solver='adam',
+                               alpha=0.0001, learning_rate='constant', max_iter=1000)}
+# Classifiers trained directly on the sparse TF-IDF matrix (without LSA)
+SPARSE_MODELS = {'CNB': ComplementNB(),
+                 'LinearLR': LogisticRegression(solver='liblinear', C=10),
+                 'LinearSVM': LinearSVC(C=1)}
+DEFAULT_COMPONENTS = 100
+DEFAULT_N_ITER = 10          # randomized SVD iterations (see benchmark_lsa.py)
+DEFAULT_FOLDS = 10
+ROC_GRID = np.linspace(0, 1, 100)
+
+def load_data(artifacts=None, stage=None, pickle_path=None):
+    """Loads tokenized titles and labels from a stage of an artifact store or from a DataFrame pickle
+
+    Args:
+        artifacts (string): Folder of artifact store
+        stage (string): Name of stage with title and label columns
+        pickle_path (string): Path of (trusted) DataFrame pickle, used if artifacts is None
+
+    Returns:
+        tuple: (numpy.ndarray of titles, numpy.ndarray of labels)
+    """
+
+    if artifacts is not None:
+        data = ArtifactStore(artifacts).read(stage, columns=['title', 'label'])
+    else:
+        with open(pickle_path, 'rb') as f:
+            data = pickle.load(f)
+    return np.array(data['title']), np.array(data['label'])
+
+def fit_features(X_text, components=DEFAULT_COMPONENTS, n_iter=DEFAULT_N_ITER):
+    """Fits the TF-IDF representation and its LSA reduction
+
+    Args:
+        X_text (numpy.ndarray): Tokenized titles
+        components (int): Number of LSA components | 0 to keep the sparse TF-IDF matrix
+        n_iter (int): Iterations of randomized SVD
+
+    Returns:
+        tuple: (TfidfVectorizer, TruncatedSVD | None, features of X_text)
+    """
+
+    vectorizer = TfidfVectorizer().fit(X_text)
+    X = vectorizer.transform(X_text)
+    if not components:
+        return vectorizer, None, X
+    lsa = TruncatedSVD(n_components=components, n_iter=n_iter, random_state=0).fit(X)
+    return vectorizer, lsa, lsa.transform(X)
+
+def fold_features(X_text, train, test, components=DEFAULT_COMPONENTS, n_iter=DEFAULT_N_ITER):
+    """Fits TF-IDF and LSA on the train split of a fold and transforms both splits
+
+    Returns:
+        tuple: (train features, test features, seconds spent)
+    """
+
+    start = time.perf_counter()
+    vectorizer, lsa, X_train = fit_features(X_text[train], components, n_iter)
+    X_test = vectorizer.transform(X_text[test])
+    if lsa is not None:
+        X_test = lsa.transform(X_test)
+    return X_train, X_test, time.perf_counter() - start
+
+def evaluate(name, classifier, fold, X_train, y_train, X_test, y_test):
+    """Fits a classifier on a fold and measures it
+
+    Returns:
+        dictionary: Metrics, timings and interpolated ROC curve of the fold
+    """
+
+    start = time.perf_counter()
+    classifier = clone(classifier).fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    predicted = classifier.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+    if hasattr(classifier, 'predict_proba'):
+        scores = classifier.predict_proba(X_test)[:, 1]
+    else:
+        scores = classifier.decision_function(X_test)
+    fpr, tpr, _ = roc_curve(y_test, scores)
+    roc = np.interp(ROC_GRID, fpr, tpr)
+    roc[0] = 0.0
+    return {'model': name, 'fold': fold,
+            'precision': precision_score(y_test, predicted), 'recall': recall_score(y_test, predicted),
+            'f1': f1_score(y_test, predicted), 'auc': roc_auc_score(y_test, scores),
+            'fit_seconds': fit_seconds, 'predict_seconds': predict_seconds, 'roc_tpr': roc.tolist()}
+
+def cross_validate(X_text, y, models, folds=DEFAULT_FOLDS, components=DEFAULT_COMPONENTS,
+                   n_iter=DEFAULT_N_ITER, n_jobs=-1):
+    """Cross-validates classifiers, fitting the features once per fold and training in parallel
+
+    Args:
+        X_text (numpy.ndarray): Tokenized titles
+        y (numpy.ndarray): Labels
+        models (dictionary): Classifiers by name
+        folds (int): Number of stratified folds
+        components (int): Number of LSA components | 0 to train on the sparse TF-IDF matrix
+        n_iter (int): Iterations of randomized SVD
+        n_jobs (int): Number of processes (-1 for all CPUs)
+
+    Returns:
+        list of dictionary: Result of each model in each fold (see evaluate)
+    """
+
+    splits = list(StratifiedKFold(n_splits=folds).split(X_text, y))
+    with Parallel(n_jobs=n_jobs) as parallel:
+        features = parallel(delayed(fold_features)(X_text, train, test, components, n_iter)
+                            for train, test in splits)
+        results = parallel(delayed(evaluate)(name, classifier, fold, X_train, y[train], X_test, y[test])
+                           for fold, ((train, test), (X_train, X_test, _)) in enumerate(zip(splits, features))
+                           for name, classifier in models.items())
+    for result in results:
+        result['feature_seconds'] = features[result['fold']][2]
+    return results
+
+def fit_pipeline(X_text, y, classifier, components=DEFAULT_COMPONENTS, n_iter=DEFAULT_N_ITER):
+    """Fits TF-IDF, LSA and a classifier over all data, for scoring new headlines
+
+    Returns:
+        tuple: (TfidfVectorizer, TruncatedSVD | None, fitted classifier)
+    """
+
+    vectorizer, lsa, X = fit_features(X_text, components, n_iter)
+    return vectorizer, lsa, clone(classifier).fit(X, y)
+
+def summarize(results):
+    """Averages the metrics of every model over the folds
+
+    Args:
+        results (list of dictionary): Results of cross_validate
+
+    Returns:
+        dictionary: Mean and standard deviation of each metric by model, with the mean ROC curve
+    """
+
+    summary = {}
+    for name in dict.fromkeys(r['model'] for r in results):
+        rows = [r for r in results if r['model'] == name]
+        summary[name] = {metric: {'mean': float(np.mean([r[metric] for r in rows])),
+                                  'std': float(np.std([r[metric] for r in rows]))}
+                         for metric in ['precision', 'recall', 'f1', 'auc', 'fit_seconds', 'predict_seconds']}
+        mean_tpr = np.mean([r['roc_tpr'] for r in rows], axis=0)
+        mean_tpr[-1] = 1.0
+        summary[name]['roc'] = {'fpr': ROC_GRID.tolist(), 'tpr': mean_tpr.tolist()}
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cross-validates the classifiers over tokenized titles')
+    parser.add_argument('--artifacts', help='Folder of artifact store')
+    parser.add_argument('--stage', default='balanced_retokenized_en', help='Stage with title and label columns')
+    parser.add_argument('--pickle', help='DataFrame pickle to use instead of an artifact store')
+    parser.add_argument('--models', nargs='+', choices=list(MODELS) + list(SPARSE_MODELS),
+                        help='Classifiers to evaluate (default: all dense ones, or all sparse ones with --sparse)')
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS, help='Number of stratified folds (0 to skip validation)')
+    parser.add_argument('--components', type=int, default=DEFAULT_COMPONENTS, help='LSA components')
+    parser.add_argument('--sparse', action='store_true', help='Skips LSA and trains on the sparse TF-IDF matrix')
+    parser.add_argument('--n-iter', type=int, default=DEFAULT_N_ITER, help='Iterations of randomized SVD')
+    parser.add_argument('--jobs', type=int, default=-1, help='Parallel processes (default: all CPUs)')
+    parser.add_argument('--output', default='metrics.json', help='JSON file of results')
+    parser.add_argument('--save', metavar='PATH', help='Fits the first model over all data and saves its pipeline as a bundle folder')
+    args = parser.parse_args()
+    if args.artifacts is None and args.pickle is None:
+        parser.error('one of --artifacts or --pickle is required')
+    available = SPARSE_MODELS if args.sparse else MODELS
+    args.models = args.models or list(available)
+    if set(args.models) - set(available):
+        parser.error(f'{", ".join(sorted(set(args.models) - set(available)))} need '
+                     + ('LSA features (remove --sparse)' if args.sparse else 'sparse features (use --sparse)'))
+    if args.sparse:
+        args.components = 0
+
+    X_text, y = load_data(args.artifacts, args.stage, args.pickle)
+    if args.save:
+        save_pipeline(args.save, *fit_pipeline(X_text, y, available[args.models[0]], args.components, args.n_iter))
+        print(f'Pipeline of {args.models[0]} saved into {args.save}')
+    if not args.folds:
+        sys.exit()
+    start = time.perf_counter()
+    results = cross_validate(X_text, y, {name: available[name] for name in args.models},
+                             args.folds, args.components, args.n_iter, args.jobs)
+    summary = summarize(results)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'config': vars(args), 'seconds': time.perf_counter() - start,
+                   'summary': summary, 'folds': results}, f, indent=2)
+    for name, metrics in summary.items():
+        print(f'{name:<5} ' + '  '.join(f'{m}={metrics[m]["mean"]:.4f}±{metrics[m]["std"]:.4f}'
+                                        for m in ['precision', 'recall', 'f1', 'auc', 'fit_seconds']))
+    print(f'Results saved into {args.output}')
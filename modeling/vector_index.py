@@ -0,0 +1,379 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Nearest neighbour index of LSA vectors, for KNN classification and near-duplicate headlines
+"""
+
+import os
+import json
+import shutil
+import argparse
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
+from bundle import Bundle
+
+try:
+    import hnswlib
+    DEFAULT_BACKEND = 'hnsw'
+except ImportError:
+    hnswlib = None
+    DEFAULT_BACKEND = 'ivf'
+
+METRICS = ['cosine', 'l2']
+DEFAULT_M = 16               # links per node of HNSW graph
+DEFAULT_EF_CONSTRUCTION = 200
+DEFAULT_EF = 64              # candidates kept by HNSW searches
+DEFAULT_N_PROBE = 8          # inverted lists visited by IVF searches
+TRAIN_FACTOR = 40            # IVF lists are trained when there are TRAIN_FACTOR vectors per list
+RETRAIN_GROWTH = 2           # IVF lists are trained again when the vectors grow by this factor
+KMEANS_ITERATIONS = 10
+DEFAULT_DUPLICATE_DISTANCE = 0.05   # cosine distance under which headlines are near duplicates
+
+class VectorIndex:
+    """Approximate nearest neighbour index with incremental inserts
+
+    With hnswlib installed vectors go into an HNSW graph; otherwise an IVF index in
+    numpy is used: vectors are kept in inverted lists of k-means centroids, trained
+    once there are enough vectors (searched by brute force until then) and trained
+    again each time the vectors grow by RETRAIN_GROWTH (with more lists, unless
+    n_lists is given), so lists stay short, and each search only visits the n_probe
+    lists nearest to the query. Distances are the cosine distance (1 - cosine
+    similarity) or the squared euclidean distance, and neighbours are given by
+    insertion position.
+
+    Args:
+        dim (int): Dimension of vectors (number of LSA components)
+        metric (string): 'cosine' | 'l2'
+        backend (string): 'hnsw' | 'ivf' | None for hnsw if installed
+        n_lists (int): Number of IVF lists | None for the square root of vectors at training
+        n_probe (int): Number of IVF lists visited by each search
+        M (int): Links per node of HNSW graph
+        ef_construction (int): Candidates kept while inserting into HNSW graph
+        ef (int): Candidates kept by HNSW searches
+    """
+
+    def __init__(self, dim, metric='cosine', backend=None, n_lists=None, n_probe=DEFAULT_N_PROBE,
+                 M=DEFAULT_M, ef_construction=DEFAULT_EF_CONSTRUCTION, ef=DEFAULT_EF):
+        if metric not in METRICS:
+            raise ValueError(f'Unknown metric {metric}, expected one of {METRICS}')
+        backend = backend or DEFAULT_BACKEND
+        if backend == 'hnsw' and hnswlib is None:
+            raise ImportError('hnswlib is not installed, use the ivf backend')
+        self.dim = dim
+        self.metric = metric
+        self.backend = backend
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef = ef
+        self.size = 0
+        self.labels = np.empty(0, dtype=np.int64)
+        self._vectors = np.empty((0, dim), dtype=np.float32)   # IVF only, first size rows are used
+        self.centroids = None                                  # IVF only, None until trained
+        self._trained_size = 0                                 # IVF only, vectors when lists were trained
+        self._lists = []
+        self._graph = None                                     # HNSW only
+
+    def __len__(self):
+        return self.size
+
+    def _prepare(self, vectors):
+        vectors = np.ascontiguousarray(np.atleast_2d(vectors), dtype=np.float32)
+        if self.metric == 'cosine':
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        return vectors
+
+    def _distances(self, queries, vectors):
+        if self.metric == 'cosine':
+            return 1 - queries @ vectors.T
+        return (queries ** 2).sum(axis=1)[:, None] - 2 * queries @ vectors.T + (vectors ** 2).sum(axis=1)[None, :]
+
+    def add(self, vectors, labels=None):
+        """Inserts vectors after the ones already indexed
+
+        Args:
+            vectors (numpy.ndarray): Vectors of shape (n, dim)
+            labels (numpy.ndarray): Label of each vector (1 for fake news) | None for unknown (-1)
+
+        Returns:
+            numpy.ndarray: Positions of inserted vectors
+        """
+
+        vectors = self._prepare(vectors)
+        positions = np.arange(self.size, self.size + len(vectors))
+        labels = np.full(len(vectors), -1) if labels is None else np.asarray(labels)
+        self.labels = np.concatenate([self.labels, labels.astype(np.int64)])
+        if self.backend == 'hnsw':
+            if self._graph is None:
+                self._graph = hnswlib.Index(space='cosine' if self.metric == 'cosine' else 'l2', dim=self.dim)
+                self._graph.init_index(max_elements=max(2 * len(vectors), 1024), ef_construction=self.ef_construction,
+                                       M=self.M)
+            if self.size + len(vectors) > self._graph.get_max_elements():
+                self._graph.resize_index(2 * (self.size + len(vectors)))
+            self._graph.add_items(vectors, positions)
+        else:
+            if self.size + len(vectors) > len(self._vectors):   # grows by doubling, so inserts stay amortized O(n)
+                grown = np.empty((max(2 * len(self._vectors), self.size + len(vectors)), self.dim), dtype=np.float32)
+                grown[:self.size] = self._vectors[:self.size]
+                self._vectors = grown
+            self._vectors[self.size:self.size + len(vectors)] = vectors
+            if self.centroids is not None:
+                if self.size + len(vectors) >= RETRAIN_GROWTH * self._trained_size:
+                    self.size += len(vectors)
+                    self._train()
+                    return positions
+                self._assign(vectors, positions)
+            elif self.size + len(vectors) >= TRAIN_FACTOR * self._lists_to_train(self.size + len(vectors)):
+                self.size += len(vectors)
+                self._train()
+                return positions
+        self.size += len(vectors)
+        return positions
+
+    def _lists_to_train(self, size):
+        return self.n_lists or max(int(np.sqrt(size)), 1)
+
+    def _train(self):
+        rng = np.random.default_rng(0)
+        n_lists = self._lists_to_train(self.size)
+        sample = self._vectors[rng.choice(self.size, min(self.size, TRAIN_FACTOR * n_lists * 4), replace=False)]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            nearest = self._distances(sample, centroids).argmin(axis=1)
+            for i in range(n_lists):
+                members = sample[nearest == i]
+                if len(members):
+                    centroids[i] = members.mean(axis=0)
+        if self.metric == 'cosine':
+            centroids = self._prepare(centroids)
+        self.centroids = centroids
+        self._trained_size = self.size
+        self._lists = [np.empty(0, dtype=np.int64) for _ in range(n_lists)]
+        for start in range(0, self.size, 65536):
+            stop = min(start + 65536, self.size)
+            self._assign(self._vectors[start:stop], np.arange(start, stop))
+
+    def _assign(self, vectors, positions):
+        nearest = self._distances(vectors, self.centroids).argmin(axis=1)
+        for i in np.unique(nearest):
+            self._lists[i] = np.concatenate([self._lists[i], positions[nearest == i]])
+
+    def query(self, vectors, k=3):
+        """Finds the approximate k nearest indexed vectors of each vector
+
+        Args:
+            vectors (numpy.ndarray): Query vectors of shape (n, dim)
+            k (int): Number of neighbours
+
+        Returns:
+            tuple: (positions of neighbours, their distances), arrays of shape (n, k) sorted by distance,
+                   padded with -1 and infinity when fewer than k vectors are found
+        """
+
+        queries = self._prepare(vectors)
+        k_found = min(k, self.size)
+        positions = np.full((len(queries), k), -1, dtype=np.int64)
+        distances = np.full((len(queries), k), np.inf)
+        if not k_found:
+            return positions, distances
+        if self.backend == 'hnsw':
+            self._graph.set_ef(max(self.ef, k_found))
+            found, found_distances = self._graph.knn_query(queries, k=k_found)
+            positions[:, :k_found], distances[:, :k_found] = found, found_distances
+            return positions, distances
+        for start in range(0, len(queries), 1024):
+            batch = queries[start:start + 1024]
+            if self.centroids is None:
+                batch_distances = self._distances(batch, self._vectors[:self.size])
+                nearest = np.argpartition(batch_distances, k_found - 1, axis=1)[:, :k_found]
+                nearest = np.take_along_axis(nearest, np.take_along_axis(batch_distances, nearest, 1).argsort(1), 1)
+                positions[start:start + len(batch), :k_found] = nearest
+                distances[start:start + len(batch), :k_found] = np.take_along_axis(batch_distances, nearest, 1)
+                continue
+            probes = np.argsort(self._distances(batch, self.centroids), axis=1)[:, :self.n_probe]
+            for row, (query, probe) in enumerate(zip(batch, probes), start):
+                candidates = np.concatenate([self._lists[i] for i in probe])
+                n = min(k, len(candidates))
+                if not n:
+                    continue
+                candidate_distances = self._distances(query[None, :], self._vectors[candidates])[0]
+                nearest = np.argpartition(candidate_distances, n - 1)[:n]
+                nearest = nearest[np.argsort(candidate_distances[nearest])]
+                positions[row, :n], distances[row, :n] = candidates[nearest], candidate_distances[nearest]
+        return positions, distances
+
+    def predict_proba(self, vectors, k=3):
+        """Gets the fraction of fake news among the k nearest labeled neighbours of each vector
+
+        Args:
+            vectors (numpy.ndarray): Query vectors of shape (n, dim)
+            k (int): Number of neighbours
+
+        Returns:
+            numpy.ndarray: Probabilities of class 1 (0.5 if no labeled neighbour is found)
+        """
+
+        positions, _ = self.query(vectors, k)
+        if not self.size:
+            return np.full(len(positions), 0.5)
+        labels = np.where(positions >= 0, self.labels[positions], -1)
+        labeled = (labels >= 0).sum(axis=1)
+        return np.where(labeled > 0, (labels == 1).sum(axis=1) / np.maximum(labeled, 1), 0.5)
+
+    def near_duplicates(self, max_distance=DEFAULT_DUPLICATE_DISTANCE, k=10, positions=None):
+        """Finds indexed vectors closer than max_distance to an earlier indexed vector
+
+        Args:
+            max_distance (float): Maximum distance of near duplicates
+            k (int): Number of neighbours searched for each vector
+            positions (numpy.ndarray): Positions of vectors to check | None for all
+
+        Returns:
+            list of tuple: (position, position of an earlier near duplicate, distance)
+        """
+
+        positions = np.arange(self.size) if positions is None else np.asarray(positions)
+        pairs = []
+        for start in range(0, len(positions), 65536):
+            batch = positions[start:start + 65536]
+            neighbours, distances = self.query(self.vectors(batch), k + 1)
+            for position, row, row_distances in zip(batch.tolist(), neighbours, distances):
+                pairs.extend((position, int(n), float(d)) for n, d in zip(row, row_distances)
+                             if 0 <= n < position and d <= max_distance)
+        return pairs
+
+    def vectors(self, positions):
+        """Gets indexed vectors (normalized for cosine metric) by position"""
+
+        if self.backend == 'hnsw':
+            return np.asarray(self._graph.get_items(positions), dtype=np.float32)
+        return self._vectors[positions]
+
+    def save(self, directory):
+        """Saves the index into a folder, replacing the previous one only when fully written
+
+        Args:
+            directory (string): Folder of index
+
+        Returns:
+            Nothing
+        """
+
+        temporary = f'{directory}.{os.getpid()}.tmp'
+        shutil.rmtree(temporary, ignore_errors=True)
+        os.makedirs(temporary)
+        settings = {'dim': self.dim, 'metric': self.metric, 'backend': self.backend, 'n_lists': self.n_lists,
+                    'n_probe': self.n_probe, 'M': self.M, 'ef_construction': self.ef_construction, 'ef': self.ef}
+        with open(os.path.join(temporary, 'index.json'), 'w', encoding='utf-8') as f:
+            json.dump({**settings, 'size': self.size, 'trained': self.centroids is not None,
+                       'trained_size': self._trained_size}, f, indent=2)
+        np.save(os.path.join(temporary, 'labels.npy'), self.labels)
+        if self.backend == 'hnsw':
+            if self._graph is not None:
+                self._graph.save_index(os.path.join(temporary, 'hnsw.bin'))
+        else:
+            np.save(os.path.join(temporary, 'vectors.npy'), self._vectors[:self.size])
+            if self.centroids is not None:
+                np.save(os.path.join(temporary, 'centroids.npy'), self.centroids)
+                np.savez(os.path.join(temporary, 'lists.npz'), *self._lists)
+        previous = f'{directory}.{os.getpid()}.old'
+        if os.path.exists(directory):
+            os.replace(directory, previous)
+        os.replace(temporary, directory)
+        shutil.rmtree(previous, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory):
+        """Loads an index saved by save
+
+        Args:
+            directory (string): Folder of index
+
+        Returns:
+            VectorIndex: Saved index, ready for new inserts
+        """
+
+        with open(os.path.join(directory, 'index.json'), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        size, trained, trained_size = state.pop('size'), state.pop('trained'), state.pop('trained_size', None)
+        index = cls(**state)
+        index.size = size
+        index.labels = np.load(os.path.join(directory, 'labels.npy'))
+        if index.backend == 'hnsw':
+            if size:
+                index._graph = hnswlib.Index(space='cosine' if index.metric == 'cosine' else 'l2', dim=index.dim)
+                index._graph.load_index(os.path.join(directory, 'hnsw.bin'))
+        else:
+            index._vectors = np.load(os.path.join(directory, 'vectors.npy'))
+            if trained:
+                index.centroids = np.load(os.path.join(directory, 'centroids.npy'))
+                index._trained_size = size if trained_size is None else trained_size
+                with np.load(os.path.join(directory, 'lists.npz')) as lists:
+                    index._lists = [lists[f'arr_{i}'] for i in range(len(lists.files))]
+        return index
+
+class IndexedKNNClassifier(BaseEstimator, ClassifierMixin):
+    """KNN classifier answered by a VectorIndex instead of a brute force search
+
+    Args:
+        n_neighbors (int): Number of neighbours voting
+        metric (string): 'cosine' | 'l2'
+        backend (string): 'hnsw' | 'ivf' | None for hnsw if installed
+    """
+
+    def __init__(self, n_neighbors=3, metric='l2', backend=None):
+        self.n_neighbors = n_neighbors
+        self.metric = metric
+        self.backend = backend
+
+    def fit(self, X, y):
+        X, y = np.asarray(X), np.asarray(y)
+        self.classes_ = np.array([0, 1])
+        self.index_ = VectorIndex(X.shape[1], self.metric, self.backend)
+        self.index_.add(X, y)
+        return self
+
+    def predict_proba(self, X):
+        probabilities = self.index_.predict_proba(np.asarray(X), self.n_neighbors)
+        return np.column_stack([1 - probabilities, probabilities])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+
+if __name__ == '__main__':
+    from train import load_data   # train registers IndexedKNNClassifier, so it is imported here
+
+    parser = argparse.ArgumentParser(description='Indexes the LSA vectors of tokenized titles and lists near duplicates')
+    parser.add_argument('bundle', help='Bundle with LSA saved by train.py --save')
+    parser.add_argument('index', help='Folder of index (new titles are appended if it exists)')
+    parser.add_argument('--artifacts', help='Folder of artifact store')
+    parser.add_argument('--stage', default='balanced_retokenized_en', help='Stage with title and label columns')
+    parser.add_argument('--pickle', help='DataFrame pickle to use instead of an artifact store')
+    parser.add_argument('--metric', choices=METRICS, default='cosine', help='Distance of a new index')
+    parser.add_argument('--backend', choices=['hnsw', 'ivf'], help='Structure of a new index (default: hnsw if installed)')
+    parser.add_argument('--duplicates', type=float, metavar='DISTANCE',
+                        help='Prints the pairs of titles closer than DISTANCE (e.g. 0.05)')
+    args = parser.parse_args()
+    if args.artifacts is None and args.pickle is None:
+        parser.error('one of --artifacts or --pickle is required')
+
+    bundle = Bundle(args.bundle)
+    if not bundle.manifest['lsa']:
+        parser.error('bundle has no LSA, so its vectors are sparse')
+    X_text, y = load_data(args.artifacts, args.stage, args.pickle)
+    vectors = bundle.features(list(X_text))
+    index = VectorIndex.load(args.index) if os.path.exists(args.index) \
+            else VectorIndex(vectors.shape[1], args.metric, args.backend)
+    positions = index.add(vectors, y)
+    index.save(args.index)
+    print(f'Indexed {len(vectors)} titles ({len(index)} in total, {index.backend} backend)')
+    if args.duplicates is not None:
+        titles = dict(zip(positions.tolist(), X_text))
+        pairs = index.near_duplicates(args.duplicates, positions=positions)
+        for position, duplicate, distance in pairs:
+            print(f'{distance:.4f}  {titles.get(position)!r}  ~  {titles.get(duplicate, f"#{duplicate}")!r}')
+        print(f'{len(pairs)} near duplicates of new titles')
@@ -0,0 +1,219 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Columnar store of intermediate DataFrames (Parquet parts described by a manifest)
+"""
+
+import os
+import json
+import shutil
+import pickle
+import hashlib
+import argparse
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from datetime import datetime
+from urllib.parse import quote
+from preprocessing_common import file_hash
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+DEFAULT_COMPRESSION = 'zstd'
+DEFAULT_ROWS_PER_PART = 1000000
+
+class ArtifactStore:
+    """Folder of stages (e.g. 'translated', 'corrected', 'tokenized'), each one a set of Parquet parts
+
+    A stage is written into a temporary folder that replaces the previous version only
+    when every part and the manifest are written. The manifest holds the schema, the
+    row count and SHA-256 hash of every part, the partition of each part and a content
+    hash of the whole stage. Reads can project columns and select partitions, so a
+    stage is never loaded beyond the columns and partitions that are used.
+
+    Args:
+        directory (string): Folder of the store (created if missing)
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def stages(self):
+        """Gets the names of the stages written
+
+        Returns:
+            list of string: Names of stages
+        """
+
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.isfile(os.path.join(self.directory, name, MANIFEST_NAME)))
+
+    def manifest(self, stage):
+        """Gets the manifest of a stage
+
+        Args:
+            stage (string): Name of stage
+
+        Returns:
+            dictionary: Manifest of stage
+
+        Raises:
+            FileNotFoundError: If stage was not written
+        """
+
+        with open(os.path.join(self.directory, stage, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def write(self, stage, data, partition_by=None, compression=DEFAULT_COMPRESSION,
+              rows_per_part=DEFAULT_ROWS_PER_PART):
+        """Writes (or replaces) a stage
+
+        Args:
+            stage (string): Name of stage
+            data (pandas.core.frame.DataFrame | pyarrow.Table): Data of stage (index is not kept, see arrow_table)
+            partition_by (string): Column whose values split the parts (e.g. 'origin') | None
+            compression (string): Parquet compression codec
+            rows_per_part (int): Maximum rows of each part
+
+        Returns:
+            dictionary: Manifest of stage
+        """
+
+        table = data if isinstance(data, pa.Table) else arrow_table(data)
+        final = os.path.join(self.directory, stage)
+        temporary = f'{final}.{os.getpid()}.tmp'
+        shutil.rmtree(temporary, ignore_errors=True)
+        os.makedirs(temporary)
+        if partition_by is None:
+            partitions = [(None, table)]
+        else:
+            column = table.column(partition_by)
+            partitions = [(value, table.filter(pc.is_null(column) if value is None else pc.equal(column, value)))
+                          for value in column.unique().to_pylist()]
+        parts = []
+        for value, partition in partitions:
+            folder = '' if partition_by is None else f'{partition_by}={quote(str(value), safe="")}'
+            os.makedirs(os.path.join(temporary, folder), exist_ok=True)
+            for number, offset in enumerate(range(0, max(partition.num_rows, 1), rows_per_part)):
+                path = os.path.join(folder, f'part-{number:05d}.parquet')
+                pq.write_table(partition.slice(offset, rows_per_part), os.path.join(temporary, path),
+                               compression=compression)
+                parts.append({'path': path.replace(os.sep, '/'), 'partition': None if value is None else str(value),
+                              'rows': min(rows_per_part, partition.num_rows - offset),
+                              'sha256': file_hash(os.path.join(temporary, path))})
+        manifest = {'version': MANIFEST_VERSION, 'stage': stage, 'created_at': datetime.now().isoformat(),
+                    'schema': [{'name': f.name, 'type': str(f.type)} for f in table.schema],
+                    'rows': table.num_rows, 'partition_by': partition_by, 'compression': compression,
+                    'parts': parts,
+                    'content_hash': hashlib.sha256(''.join(p['sha256'] for p in parts).encode('ascii')).hexdigest()}
+        with open(os.path.join(temporary, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        previous = f'{final}.{os.getpid()}.old'
+        if os.path.exists(final):
+            os.replace(final, previous)
+        os.replace(temporary, final)
+        shutil.rmtree(previous, ignore_errors=True)
+        return manifest
+
+    def read_table(self, stage, columns=None, partitions=None, memory_map=False, verify=False):
+        """Reads a stage as an Arrow table
+
+        Args:
+            stage (string): Name of stage
+            columns (list of string): Columns to read | None for all
+            partitions (iterable of string): Values of partition column to read | None for all
+            memory_map (bool): If True, memory maps the Parquet files (pages are still decoded into
+                memory, so it only spares the reads of stages written with compression='none')
+            verify (bool): If True, checks the hash of every part read
+
+        Returns:
+            pyarrow.Table: Data of stage
+
+        Raises:
+            ValueError: If verify is True and a part does not match its hash
+        """
+
+        manifest = self.manifest(stage)
+        selected = None if partitions is None else {str(p) for p in partitions}
+        tables = []
+        for part in manifest['parts']:
+            if selected is not None and part['partition'] not in selected:
+                continue
+            path = os.path.join(self.directory, stage, *part['path'].split('/'))
+            if verify and file_hash(path) != part['sha256']:
+                raise ValueError(f'Part {part["path"]} of stage {stage} does not match its hash')
+            tables.append(pq.read_table(path, columns=columns, memory_map=memory_map))
+        if not tables and manifest['parts']:
+            path = os.path.join(self.directory, stage, *manifest['parts'][0]['path'].split('/'))
+            schema = pq.read_schema(path)
+            return schema.empty_table().select(columns) if columns is not None else schema.empty_table()
+        return pa.concat_tables(tables) if tables else pa.table({})
+
+    def read(self, stage, columns=None, partitions=None, memory_map=False, verify=False):
+        """Reads a stage as a DataFrame (see read_table)
+
+        Returns:
+            pandas.core.frame.DataFrame: Data of stage
+        """
+
+        return self.read_table(stage, columns, partitions, memory_map, verify).to_pandas()
+
+    def verify(self, stage):
+        """Checks every part of a stage against the hashes of its manifest
+
+        Args:
+            stage (string): Name of stage
+
+        Returns:
+            bool: True if all parts match
+        """
+
+        manifest = self.manifest(stage)
+        return all(file_hash(os.path.join(self.directory, stage, *p['path'].split('/'))) == p['sha256']
+                   for p in manifest['parts'])
+
+def arrow_table(frame):
+    """Converts a DataFrame into an Arrow table (index is not kept)
+
+    Object columns holding values Arrow has no type for, such as the bson.ObjectId
+    of the _id of MongoDB documents, are stored as strings.
+
+    Args:
+        frame (pandas.core.frame.DataFrame): Data to convert
+
+    Returns:
+        pyarrow.Table: Data as Arrow table
+    """
+
+    try:
+        return pa.Table.from_pandas(frame, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    frame = frame.copy()
+    for column in frame.columns[frame.dtypes == object]:
+        try:
+            pa.array(frame[column], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            frame[column] = frame[column].map(lambda value: value if value is None or value != value else str(value))
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Lists stages of an artifact store or converts DataFrame pickles into it')
+    parser.add_argument('directory', help='Folder of artifact store')
+    parser.add_argument('--convert', nargs=2, metavar=('PICKLE', 'STAGE'),
+                        help='Writes the DataFrame of a (trusted) pickle file as a stage')
+    parser.add_argument('--partition-by', help='Column whose values split the parts of converted stage')
+    args = parser.parse_args()
+
+    store = ArtifactStore(args.directory)
+    if args.convert:
+        with open(args.convert[0], 'rb') as f:
+            frame = pickle.load(f)
+        store.write(args.convert[1], frame, partition_by=args.partition_by)
+    for stage in store.stages():
+        manifest = store.manifest(stage)
+        print(f'{stage}: {manifest["rows"]} rows in {len(manifest["parts"])} parts, '
+              f'columns {", ".join(f["name"] for f in manifest["schema"])}')
@@ -0,0 +1,246 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Batched text cleaning of headlines (noise removal, spelling correction, lowerization and synonyms)
+"""
+
+import os
+import re
+import unidecode
+from concurrent.futures import ProcessPoolExecutor
+from nltk.corpus import wordnet
+from nltk.tag import pos_tag
+from spellchecker import SpellChecker
+from textblob import Word
+from token_cache import TokenCache
+from token_cache import flush_caches
+from token_cache import library_version
+from token_cache import version_hash
+
+DEFAULT_CHUNK_SIZE = 256
+TWEETS_ORIGIN = 'Kaggle'
+PONCTUATION = ['.', ',', ';', ':', '!', '?', '\\', '/', '_', '-', '~']
+PONCTUATION_TABLE = str.maketrans('', '', ''.join(PONCTUATION))
+# A token starting with '#', '@' or 'https:', with the space before it
+HASHTAGS_CITATIONS_PATTERN = r' (?:#|@|https:)[^ ]*'
+# Same tokens TextBlob.correct corrects one by one (words, symbols and whitespaces)
+CORRECTION_TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]|\s')
+SYNONYM_TAGS = ['JJ', 'NN']   # tags of words replaced by synonyms in the augmentation of the notebook
+
+_spell = None
+_synonyms = None
+
+def _spell_checker():
+    global _spell
+    if _spell is None:
+        _spell = SpellChecker()
+    return _spell
+
+def _correct_word(word):
+    return str(Word(word).correct())
+
+def _is_unknown(word):
+    return bool(_spell_checker().unknown([word]))
+
+def _first_synonym(word):
+    for ss in wordnet.synsets(word):
+        for l in ss.lemma_names():
+            if l != word:
+                return l
+    return None
+
+def _synonym_cache():
+    # Built on first use, so WordNet is only loaded when synonyms are asked for
+    global _synonyms
+    if _synonyms is None:
+        _synonyms = TokenCache.from_environment('synonym', _first_synonym,
+                                                version_hash('synonym', library_version('nltk'), wordnet.get_version()))
+    return _synonyms
+
+CORRECTIONS = TokenCache.from_environment('correction', _correct_word,
+                                          version_hash('correction', library_version('textblob')))
+UNKNOWN_WORDS = TokenCache.from_environment('unknown', _is_unknown,
+                                            version_hash('unknown', library_version('pyspellchecker')))
+
+def remove_non_ASCII(titles):
+    """Removes non-ASCII characters (same as encoding to ASCII ignoring errors)
+
+    Args:
+        titles (pandas.Series): Titles
+
+    Returns:
+        pandas.Series: Cleaned titles
+    """
+
+    return titles.str.replace(r'[^\x00-\x7f]', '', regex=True)
+
+def remove_hashtags_citations(titles):
+    """Removes Twitter hashtags, citations and links from space separated tokens
+
+    Each title is prefixed by a space so every token is matched with the separator
+    before it, and the prefix is dropped afterwards. It gives the same result as
+    joining the tokens of title.split(' ') that are kept.
+
+    Args:
+        titles (pandas.Series): Titles
+
+    Returns:
+        pandas.Series: Cleaned titles
+    """
+
+    return (' ' + titles).str.replace(HASHTAGS_CITATIONS_PATTERN, '', regex=True).str[1:]
+
+def remove_ponct(titles):
+    """Removes ponctuation and surrounding whitespaces
+
+    Args:
+        titles (pandas.Series): Titles
+
+    Returns:
+        pandas.Series: Cleaned titles
+    """
+
+    return titles.str.translate(PONCTUATION_TABLE).str.strip()
+
+def neutralize_accents(titles):
+    """Transliterates titles to ASCII (computed once for each distinct title)
+
+    Args:
+        titles (pandas.Series): Titles
+
+    Returns:
+        pandas.Series: Transliterated titles
+    """
+
+    return map_unique(titles, unidecode.unidecode)
+
+def correct_spelling(title):
+    """Corrects spelling of a title with TextBlob, one cached token at a time
+
+    Args:
+        title (string): Title
+
+    Returns:
+        string: Corrected title (same as str(TextBlob(title).correct()))
+    """
+
+    return ''.join([CORRECTIONS(token) for token in CORRECTION_TOKEN_PATTERN.findall(title)])
+
+def lowerize(title):
+    """Lowerizes words which are not proper names nor unknown words (possibly proper names)
+
+    Args:
+        title (string): Title
+
+    Returns:
+        string: Lowerized title, with words separated by single spaces
+    """
+
+    words = [w for w in title.split(' ') if w]
+    # Tags depend on the neighbour words, so only the dictionary lookups are cached
+    propernouns = {word for word, pos in pos_tag(words) if pos == 'NNP'}
+    return ' '.join([w.lower() if (w not in propernouns) and not UNKNOWN_WORDS(w.lower()) else w
+                     for w in words])
+
+def get_synonym(word):
+    """Gets the first WordNet lemma name of a word besides itself (cached)
+
+    The get_synonym of the treatment notebook looks for the same lemma name, but
+    returns the word itself once it is found.
+
+    Args:
+        word (string): Word
+
+    Returns:
+        string: Synonym of word | word if WordNet has none
+    """
+
+    return _synonym_cache()(word) or word
+
+def synonymize(title):
+    """Replaces adjectives and nouns of a title by synonyms, as the synonyms augmentation of the notebook
+
+    Args:
+        title (string): Title
+
+    Returns:
+        string: Generated title, with words separated by single spaces
+    """
+
+    words = [w for w in title.split(' ') if w]
+    return ' '.join([get_synonym(w) if pos in SYNONYM_TAGS else w for w, pos in pos_tag(words)])
+
+def map_unique(titles, function):
+    """Applies a function once for each distinct title
+
+    Args:
+        titles (pandas.Series): Titles
+        function (function): Transforms one title
+
+    Returns:
+        pandas.Series: Transformed titles, with the same index
+    """
+
+    uniques = titles.unique()
+    mapping = dict(zip(uniques, map(function, uniques)))
+    flush_caches()
+    return titles.map(mapping)
+
+def _apply_chunk(function, chunk):
+    results = [function(title) for title in chunk]
+    flush_caches()
+    return results
+
+def map_parallel(titles, function, executor=None, chunksize=DEFAULT_CHUNK_SIZE):
+    """Applies a function once for each distinct title, in chunks spread over processes
+
+    Args:
+        titles (pandas.Series): Titles
+        function (function): Transforms one title (must be a module level function)
+        executor (concurrent.futures.Executor): Pool of processes | None to run serially
+        chunksize (int): Number of titles sent to a process at a time
+
+    Returns:
+        pandas.Series: Transformed titles, with the same index
+    """
+
+    if executor is None:
+        return map_unique(titles, function)
+    uniques = list(titles.unique())
+    chunks = [uniques[i:i + chunksize] for i in range(0, len(uniques), chunksize)]
+    results = executor.map(_apply_chunk, [function] * len(chunks), chunks)
+    mapping = dict(zip(uniques, (r for chunk in results for r in chunk)))
+    return titles.map(mapping)
+
+def clean_titles(titles, origins, correct=True, workers=None, chunksize=DEFAULT_CHUNK_SIZE, executor=None):
+    """Runs the treatment steps over all titles, with the same output as applying them row by row
+
+    Tweets (titles of the Kaggle origin) lose non-ASCII characters, hashtags, citations
+    and links. Then every title loses ponctuation and accents, tweets are spell checked
+    (if correct) and finally words which are not proper names are lowerized.
+
+    Args:
+        titles (pandas.Series): Titles
+        origins (pandas.Series): Origin of each title (same index as titles)
+        correct (bool): If True, corrects the spelling of tweets
+        workers (int): Number of processes for spelling correction and lowerization
+            (default: number of CPUs, 0 to run them in this process)
+        chunksize (int): Number of titles sent to a process at a time
+        executor (concurrent.futures.Executor): Pool of processes reused between calls | None for a new one
+
+    Returns:
+        pandas.Series: Cleaned titles, with the same index
+    """
+
+    if executor is None and workers != 0:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            return clean_titles(titles, origins, correct, workers, chunksize, executor)
+    titles = titles.copy()
+    tweets = origins == TWEETS_ORIGIN
+    titles[tweets] = remove_hashtags_citations(remove_non_ASCII(titles[tweets]))
+    titles = neutralize_accents(remove_ponct(titles))
+    if correct and tweets.any():
+        titles[tweets] = map_parallel(titles[tweets], correct_spelling, executor, chunksize)
+    return map_parallel(titles, lowerize, executor, chunksize)
+
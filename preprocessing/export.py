@@ -0,0 +1,119 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Export of raw collections for the treatment stage, filtered and projected by MongoDB
+"""
+
+import os
+import sys
+import argparse
+import pyarrow as pa
+from bson.regex import Regex
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'crawlers'))
+from crawlers_common import mongo_collection
+from artifacts import ArtifactStore
+from preprocessing_common import CONTEXT_PATTERN
+from preprocessing_common import CUSTOM_PATTERN
+from preprocessing_common import REPORTS_PATTERN
+from preprocessing_common import SOURCES
+
+DEFAULT_BATCH_SIZE = 10000
+SCHEMA = pa.schema([('_id', pa.string()), ('title', pa.string()), ('datetime', pa.timestamp('ms')),
+                    ('label', pa.int64()), ('language', pa.string()), ('origin', pa.string())])
+
+def source_pipeline(source, filter_context=True):
+    """Builds the aggregation pipeline that exports a raw collection
+
+    Only the used fields are projected, labels are computed by the server and, for
+    sources of real news in Portuguese, titles out of context, reporting numbers or
+    with custom substrings are filtered by the server. Note that MongoDB regular
+    expressions treat only ASCII letters and digits as word characters for \\b, and
+    that they run over raw titles (before quotes and line breaks are removed).
+
+    Args:
+        source (string): Name of source in SOURCES
+        filter_context (bool): If False, exports every title
+
+    Returns:
+        list of dictionary: Aggregation pipeline
+    """
+
+    language, label = SOURCES[source]
+    pipeline = []
+    if filter_context and language == 'portuguese' and label == 0:
+        pipeline.append({'$match': {'$and': [
+            {'title': {'$regex': CONTEXT_PATTERN, '$options': 'i'}},
+            {'title': {'$not': Regex(REPORTS_PATTERN)}},
+            {'title': {'$not': Regex(CUSTOM_PATTERN, 'i')}}]}})
+    pipeline.append({'$project': {
+        '_id': {'$toString': '$_id'}, 'title': 1, 'datetime': 1,
+        'label': {'$literal': label} if label is not None else {'$cond': [{'$eq': ['$label', 'fake']}, 1, 0]},
+        'language': {'$literal': language}, 'origin': {'$literal': source}}})
+    return pipeline
+
+def iter_record_batches(sources=None, languages=None, filter_context=True, batch_size=DEFAULT_BATCH_SIZE):
+    """Streams the exported registries as Arrow record batches
+
+    Args:
+        sources (iterable of string): Names of sources in SOURCES | None for all
+        languages (iterable of string): Languages of sources to export | None for all
+        filter_context (bool): If False, exports every title
+        batch_size (int): Number of registries of each batch
+
+    Returns:
+        generator of pyarrow.RecordBatch: Registries with the columns of SCHEMA
+    """
+
+    for source in sources or SOURCES:
+        if languages is not None and SOURCES[source][0] not in languages:
+            continue
+        cursor = mongo_collection('raw_' + source).aggregate(source_pipeline(source, filter_context),
+                                                             batchSize=batch_size, allowDiskUse=True)
+        columns = {name: [] for name in SCHEMA.names}
+        for document in cursor:
+            for name, values in columns.items():
+                values.append(document.get(name))
+            if len(columns['_id']) >= batch_size:
+                yield _record_batch(columns)
+                columns = {name: [] for name in SCHEMA.names}
+        if columns['_id']:
+            yield _record_batch(columns)
+
+def _record_batch(columns):
+    columns['title'] = [t.replace("'", '').replace('"', '').replace('\n', '') if t is not None else t
+                        for t in columns['title']]
+    return pa.RecordBatch.from_pydict(columns, schema=SCHEMA)
+
+def export_table(sources=None, languages=None, filter_context=True, batch_size=DEFAULT_BATCH_SIZE):
+    """Exports the registries of the treatment stage as an Arrow table (see iter_record_batches)
+
+    Returns:
+        pyarrow.Table: Registries with the columns of SCHEMA
+    """
+
+    return pa.Table.from_batches(iter_record_batches(sources, languages, filter_context, batch_size), schema=SCHEMA)
+
+def export_frame(sources=None, languages=None, filter_context=True, batch_size=DEFAULT_BATCH_SIZE):
+    """Exports the registries of the treatment stage as a DataFrame (see iter_record_batches)
+
+    Returns:
+        pandas.core.frame.DataFrame: Registries with the columns of SCHEMA
+    """
+
+    return export_table(sources, languages, filter_context, batch_size).to_pandas()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Exports raw collections into a stage of an artifact store')
+    parser.add_argument('directory', help='Folder of artifact store')
+    parser.add_argument('--stage', default='raw', help='Name of stage written (default: raw)')
+    parser.add_argument('--source', dest='sources', action='append', choices=list(SOURCES), help='Source to export (repeatable)')
+    parser.add_argument('--language', dest='languages', action='append', help='Language of sources to export (repeatable)')
+    parser.add_argument('--no-filter', action='store_true', help='Exports out of context titles too')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Registries per batch')
+    args = parser.parse_args()
+
+    table = export_table(args.sources, args.languages, not args.no_filter, args.batch_size)
+    ArtifactStore(args.directory).write(args.stage, table, partition_by='origin')
+    print(f'Exported {table.num_rows} registries into stage {args.stage}')
@@ -0,0 +1,204 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Incremental preprocessing of raw collections into the processed collection
+"""
+
+import os
+import sys
+import argparse
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from pymongo import ReplaceOne, UpdateOne
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'crawlers'))
+from crawlers_common import mongo_collection
+from cleaning import clean_titles
+from cleaning import DEFAULT_CHUNK_SIZE
+from preprocessing_common import CONTEXT_PATTERN
+from preprocessing_common import CUSTOM_PATTERN
+from preprocessing_common import REPORTS_PATTERN
+from preprocessing_common import SOURCES
+from tokenizing import BatchTokenizer
+
+DEFAULT_BATCH_SIZE = 5000
+RAW_FIELDS = {'title': 1, 'label': 1, 'datetime': 1}
+# Written into each raw document once it is processed; changing it processes every document again
+PREPROCESS_VERSION = 1
+
+def preprocess_titles(titles, origins, tokenizer, executor=None, correct=True, chunksize=DEFAULT_CHUNK_SIZE,
+                      workers=None):
+    """Cleans and tokenizes titles, as the treatment notebook does
+
+    Args:
+        titles (pandas.Series): Titles (already without quotes and line breaks)
+        origins (pandas.Series): Origin of each title (same index as titles)
+        tokenizer (tokenizing.BatchTokenizer): Tokenizer of cleaned titles
+        executor (concurrent.futures.Executor): Pool of processes for cleaning | None for a new one
+        correct (bool): If True, corrects the spelling of tweets
+        chunksize (int): Number of titles sent to a process at a time
+        workers (int): Number of processes of a new pool (0 to clean in this process)
+
+    Returns:
+        tuple: (pandas.Series of cleaned titles, list of stems joined by spaces)
+    """
+
+    cleaned = clean_titles(titles, origins, correct, workers, chunksize, executor)
+    return cleaned, list(tokenizer.pipe(cleaned.tolist()))
+
+def raw_frame(documents, source):
+    """Builds the DataFrame of raw documents the way the treatment notebook loads them
+
+    Args:
+        documents (list of dictionary): Raw documents (with _id, title, label and datetime)
+        source (string): Name of source in SOURCES
+
+    Returns:
+        pandas.core.frame.DataFrame: Registries with title, label, language and origin
+    """
+
+    language, label = SOURCES[source]
+    frame = pd.DataFrame(documents)
+    frame['language'] = language
+    if label is not None:
+        frame['label'] = label
+    else:
+        frame['label'] = (frame['label'] == 'fake').astype(int)
+    frame['origin'] = source
+    frame['title'] = frame['title'].str.replace("'", '', regex=False).str.replace('"', '', regex=False) \
+                                   .str.replace('\n', '', regex=False)
+    if 'datetime' not in frame:
+        frame['datetime'] = None
+    return frame
+
+def filter_reasons(frame):
+    """Gets why the treatment notebook would remove each registry, before its duplicates are dropped
+
+    Registries of real news in Portuguese are removed if out of context, reporting
+    numbers of cases/deaths or containing custom substrings (see export.py, which
+    applies the same filters in MongoDB).
+
+    Args:
+        frame (pandas.core.frame.DataFrame): Registries of raw_frame
+
+    Returns:
+        pandas.Series: Reason ('out_of_context', 'reports' or 'custom_substring') | None if kept
+    """
+
+    reasons = pd.Series(None, index=frame.index, dtype=object)
+    filtered = (frame['language'] == 'portuguese') & (frame['label'] == 0)
+    titles = frame['title'].fillna('')
+    for reason, removed in [('custom_substring', titles.str.contains(CUSTOM_PATTERN, case=False, regex=True)),
+                            ('reports', titles.str.contains(REPORTS_PATTERN, regex=True)),
+                            ('out_of_context', ~titles.str.contains(CONTEXT_PATTERN, case=False, regex=True))]:
+        reasons[filtered & removed] = reason   # the first filter of the notebook wins
+    return reasons
+
+def iter_unprocessed(source, batch_size=DEFAULT_BATCH_SIZE):
+    """Streams the raw documents of a source not processed by PREPROCESS_VERSION
+
+    Each batch is queried again after the previous one is marked as processed (see
+    preprocess_source), so documents inserted with any _id while it runs are found.
+
+    Args:
+        source (string): Name of source in SOURCES
+        batch_size (int): Number of documents of each batch
+
+    Returns:
+        generator of list of dictionary: Raw documents
+    """
+
+    collection = mongo_collection('raw_' + source)
+    while True:
+        batch = list(collection.find({'processed_version': {'$ne': PREPROCESS_VERSION}}, RAW_FIELDS)
+                     .limit(batch_size))
+        if not batch:
+            return
+        yield batch
+
+def preprocess_source(source, tokenizer, executor, batch_size=DEFAULT_BATCH_SIZE, reprocess=False):
+    """Preprocesses the unprocessed raw documents of a source into the processed collection
+
+    Processed documents keep the _id of their raw document, so writing a batch twice
+    replaces it, and have a kept flag with the filter_reason of the treatment
+    notebook filters. Titles repeating the one of a processed document keep only the
+    last processed one, like drop_duplicates(subset='title', keep="last"). Raw
+    documents get processed_version only after their batch is written, so an
+    interrupted run continues with the documents not written yet.
+
+    Args:
+        source (string): Name of source in SOURCES
+        tokenizer (tokenizing.BatchTokenizer): Tokenizer of cleaned titles
+        executor (concurrent.futures.Executor): Pool of processes for cleaning
+        batch_size (int): Number of raw documents processed at a time
+        reprocess (bool): If True, processes again all documents of source
+
+    Returns:
+        int: Number of processed documents
+    """
+
+    raw = mongo_collection('raw_' + source)
+    processed = mongo_collection('processed')
+    if reprocess:
+        raw.update_many({}, {'$unset': {'processed_version': ''}})
+    count = 0
+    for documents in iter_unprocessed(source, batch_size):
+        frame = raw_frame(documents, source)
+        frame['filter_reason'] = filter_reasons(frame)
+        unfiltered = frame['filter_reason'].isna()
+        duplicated = frame[unfiltered].duplicated(subset='title', keep='last')
+        frame.loc[duplicated[duplicated].index, 'filter_reason'] = 'duplicate'
+        frame['kept'] = frame['filter_reason'].isna()
+        frame['cleaned'], frame['tokens'] = preprocess_titles(frame['title'], frame['origin'], tokenizer, executor)
+        now = datetime.now()
+        processed.bulk_write([ReplaceOne({'_id': r['_id']}, {**r, 'processed_at': now}, upsert=True)
+                              for r in frame.to_dict('records')], ordered=False)
+        kept = frame[frame['kept']]
+        if len(kept):
+            processed.update_many({'title': {'$in': kept['title'].tolist()}, 'kept': True,
+                                   '_id': {'$nin': kept['_id'].tolist()}},
+                                  {'$set': {'kept': False, 'filter_reason': 'duplicate', 'processed_at': now}})
+        raw.bulk_write([UpdateOne({'_id': d['_id']}, {'$set': {'processed_version': PREPROCESS_VERSION}})
+                        for d in documents], ordered=False)
+        count += len(documents)
+        print(f'Processed {count} documents of raw_{source} collection ({len(kept)} of the batch kept)')
+    return count
+
+def ensure_processed_indexes(collection):
+    """Creates (if missing) the indexes used to read the processed collection and to find duplicated titles
+
+    Args:
+        collection (pymongo.collection.Collection): Processed collection
+
+    Returns:
+        Nothing
+    """
+
+    collection.create_index([('origin', 1), ('_id', 1)], name='origin_id')
+    collection.create_index([('origin', 1), ('processed_at', 1), ('_id', 1)], name='origin_processed_at')
+    collection.create_index('language', name='language')
+    collection.create_index('title', name='title')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Preprocesses only the raw documents not processed yet')
+    parser.add_argument('sources', nargs='*', metavar='SOURCE',
+                        help='Sources to preprocess among ' + ', '.join(SOURCES) + ' (default: all)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Raw documents processed at a time')
+    parser.add_argument('--workers', type=int, help='Cleaning processes (default: number of CPUs)')
+    parser.add_argument('--n-process', type=int, default=1, help='Tokenizing processes of spaCy')
+    parser.add_argument('--reprocess', action='store_true', help='Processes again every document of the sources')
+    args = parser.parse_args()
+    unknown = set(args.sources) - set(SOURCES)
+    if unknown:
+        parser.error('unknown sources: ' + ', '.join(sorted(unknown)))
+
+    ensure_processed_indexes(mongo_collection('processed'))
+    tokenizer = BatchTokenizer(n_process=args.n_process)
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for source in args.sources or SOURCES:
+            mongo_collection('raw_' + source).create_index('processed_version', name='processed_version')
+            preprocess_source(source, tokenizer, executor, args.batch_size, args.reprocess)
+
+    print('Execution finished')
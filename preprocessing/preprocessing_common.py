@@ -0,0 +1,27 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Definitions shared by preprocessing modules
+"""
+
+import hashlib
+
+# Source name: (language, label | None if each registry has a 'fake'/'real' label)
+SOURCES = {'CNN': ('portuguese', 0), 'Estadao': ('portuguese', 0), 'FatoFake': ('portuguese', 1),
+           'G1': ('portuguese', 0), 'MinisterioFake': ('portuguese', 1),
+           'SanarmedFake': ('portuguese', 1), 'UOL': ('portuguese', 0), 'Kaggle': ('english', None)}
+
+# Filters of the treatment notebook, applied to sources of real news in Portuguese
+CONTEXT_PATTERN = 'covid|corona|vacina|mascara|máscara'
+REPORTS_PATTERN = r'\b\d+\b[\s\S]*\b\d+\b'   # 2 or more numbers (reports of cases/deaths)
+CUSTOM_PATTERN = 'veja lista com perfil|casos de coronavírus na|casos de coronavírus em'
+
+def file_hash(path):
+    """Gets the SHA-256 hex digest of a file, read in blocks"""
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024*1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,64 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Checks that the batched cleaning steps give the same titles as the treatment notebook cells
+"""
+
+import pandas as pd
+import unidecode
+from cleaning import neutralize_accents
+from cleaning import remove_hashtags_citations
+from cleaning import remove_non_ASCII
+from cleaning import remove_ponct
+
+TITLES = ['Vacina contra a COVID-19 chega às farmácias; veja a lista!',
+          '#COVID19 cases rise in @WHO report: https://t.co/abc123 ... stay safe',
+          '  Máscaras são obrigatórias em São Paulo -- diz governo  ',
+          'Fake: "garlic cures coronavirus" ~ shared 10,000 times \\ again/again_again',
+          'Emoji 😷 and café ☕ in a tweet #stayhome@home https:',
+          'two  spaces  and   #tags  @ in the middle',
+          '',
+          '#',
+          '@user',
+          'Ñandú, pingüino e ação: 100% não-ASCII?']
+
+# Cells of analysis/treatment-en.ipynb, applied row by row
+def notebook_remove_non_ASCII(title, origin):
+    if origin == 'Kaggle':
+        title = title.encode("ascii", "ignore").decode()
+    return title
+
+def notebook_remove_hashtags_citations(title, origin):
+    if origin == 'Kaggle':
+        title = ' '.join([t for t in title.split(' ') if not t.startswith('#') and not t.startswith('@') and not t.startswith('https:')])
+    return title
+
+def notebook_remove_ponct(title):
+    ponct = ['.', ',', ';', ':', '!', '?', "\\", "/", "_", "-", '~']
+    for p in ponct:
+        title = title.replace(p, '')
+    return title.strip()
+
+def notebook_clean(title, origin):
+    title = notebook_remove_hashtags_citations(notebook_remove_non_ASCII(title, origin), origin)
+    return unidecode.unidecode(notebook_remove_ponct(title))
+
+def test_tweet_steps():
+    titles = pd.Series(TITLES)
+    assert remove_non_ASCII(titles).tolist() == [notebook_remove_non_ASCII(t, 'Kaggle') for t in TITLES]
+    assert remove_hashtags_citations(titles).tolist() == [notebook_remove_hashtags_citations(t, 'Kaggle')
+                                                          for t in TITLES]
+
+def test_common_steps():
+    titles = pd.Series(TITLES)
+    assert remove_ponct(titles).tolist() == [notebook_remove_ponct(t) for t in TITLES]
+    assert neutralize_accents(titles).tolist() == [unidecode.unidecode(t) for t in TITLES]
+
+def test_steps_in_sequence():
+    for origin in ['Kaggle', 'G1']:
+        titles = pd.Series(TITLES)
+        if origin == 'Kaggle':
+            titles = remove_hashtags_citations(remove_non_ASCII(titles))
+        cleaned = neutralize_accents(remove_ponct(titles))
+        assert cleaned.tolist() == [notebook_clean(t, origin) for t in TITLES]
@@ -0,0 +1,183 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Memoization of token level NLP calls, in memory and optionally in SQLite
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from importlib import metadata
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 100000   # tokens kept in memory by each cache
+DEFAULT_COMMIT_EVERY = 1000
+
+CACHES = []
+
+def version_hash(*parts):
+    """Hashes what determines the results of a cached function (name, settings, library versions)
+
+    Args:
+        parts: Values identifying the function version (converted to strings)
+
+    Returns:
+        string: Short hex digest
+    """
+
+    return hashlib.sha1('\0'.join(map(str, parts)).encode('utf-8')).hexdigest()[:16]
+
+def library_version(distribution):
+    """Gets the installed version of a distribution, from its package metadata
+
+    Args:
+        distribution (string): Name of distribution (e.g. 'textblob', 'pyspellchecker')
+
+    Returns:
+        string: Version of distribution
+
+    Raises:
+        importlib.metadata.PackageNotFoundError: If distribution is not installed
+        ValueError: If distribution has no version
+    """
+
+    version = metadata.version(distribution)
+    if not version:
+        raise ValueError(f'Distribution {distribution} has no version, cached values could not be told apart')
+    return version
+
+class TokenCache:
+    """Memoizes a function of one token with an LRU in memory and an optional SQLite store
+
+    Values are kept in the store under the version hash of the function, so results
+    of another library version or setting are never reused. Values must be JSON
+    serializable. Each process opens its own connection to the store, which may be
+    shared by several processes, and new values are committed in groups of
+    commit_every (call flush to commit the remaining ones).
+
+    Args:
+        name (string): Name of cached function (e.g. 'correction')
+        function (function): Computes the value of a token
+        version (string): Version hash of function (see version_hash)
+        maxsize (int): Maximum number of tokens kept in memory
+        path (string): Path of SQLite file | None to keep values only in memory
+        commit_every (int): Number of new values written to the store before committing
+    """
+
+    def __init__(self, name, function, version, maxsize=DEFAULT_MAXSIZE, path=None,
+                 commit_every=DEFAULT_COMMIT_EVERY):
+        self.name = name
+        self.function = function
+        self.version = version
+        self.maxsize = maxsize
+        self.path = path
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._pending = []
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+        CACHES.append(self)
+
+    @classmethod
+    def from_environment(cls, name, function, version, maxsize=DEFAULT_MAXSIZE):
+        """Creates a cache stored in the SQLite file of PREPROCESSING_CACHE_PATH variable (if set)
+
+        Args:
+            name (string): Name of cached function
+            function (function): Computes the value of a token
+            version (string): Version hash of function
+            maxsize (int): Maximum number of tokens kept in memory
+
+        Returns:
+            TokenCache: Configured cache
+        """
+
+        return cls(name, function, version, maxsize, os.environ.get('PREPROCESSING_CACHE_PATH') or None)
+
+    def __call__(self, token):
+        return self.get(token)
+
+    def get(self, token):
+        """Gets the value of a token, computing it only if it is not cached
+
+        Args:
+            token (string): Token
+
+        Returns:
+            Value of function for token
+        """
+
+        with self._lock:
+            if token in self._memory:
+                self._memory.move_to_end(token)
+                self.hits += 1
+                return self._memory[token]
+            stored = self._load(token)
+            if stored is not None:
+                self.hits += 1
+                value = json.loads(stored)
+            else:
+                self.misses += 1
+                value = self.function(token)
+                self._store(token, value)
+            self._memory[token] = value
+            if len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+            return value
+
+    def flush(self):
+        """Commits the new values into the store"""
+
+        with self._lock:
+            self._commit()
+
+    def _database(self):
+        if self.path is None:
+            return None
+        if self._pid != os.getpid():   # connections cannot be shared with forked processes
+            self._connection = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS tokens (name TEXT, version TEXT, token TEXT, '
+                                     'value TEXT, PRIMARY KEY (name, version, token))')
+            self._pending = []
+            self._pid = os.getpid()
+        return self._connection
+
+    def _load(self, token):
+        database = self._database()
+        if database is None:
+            return None
+        row = database.execute('SELECT value FROM tokens WHERE name = ? AND version = ? AND token = ?',
+                               (self.name, self.version, token)).fetchone()
+        return row[0] if row else None
+
+    def _store(self, token, value):
+        if self._database() is None:
+            return
+        self._pending.append((self.name, self.version, token, json.dumps(value)))
+        if len(self._pending) >= self.commit_every:
+            self._commit()
+
+    def _commit(self):
+        database = self._database()
+        if database is None or not self._pending:
+            return
+        with database:
+            database.executemany('INSERT OR IGNORE INTO tokens VALUES (?, ?, ?, ?)', self._pending)
+        self._pending = []
+
+def flush_caches():
+    """Commits the new values of every cache of the process
+
+    Returns:
+        Nothing
+    """
+
+    for cache in CACHES:
+        cache.flush()
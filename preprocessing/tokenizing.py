@@ -0,0 +1,135 @@
+"""Author: Bruno Tatsuya Masunaga Santos
+Organization: Universidade Federal do ABC (UFABC)
+Project: COVID-19 Fake News Detection
+Created in: 2026-10-17
+Description: Batch tokenization, lemmatization and stemming of headlines with spaCy
+"""
+
+import spacy
+from nltk.corpus import stopwords
+from nltk.stem.snowball import SnowballStemmer
+from spacy.pipeline import Lemmatizer
+from spacy.tokens import Doc
+from token_cache import TokenCache
+from token_cache import library_version
+from token_cache import version_hash
+
+DEFAULT_MODEL = 'en_core_web_sm'
+DISABLED_COMPONENTS = ['parser', 'ner']   # lemmas only need the tagger and the lemmatizer
+DEFAULT_BATCH_SIZE = 1000
+
+class BatchTokenizer:
+    """Turns titles into the space joined stems fed to the TF-IDF vectorizer
+
+    Gives the same output as tokenize_pipeline of the treatment notebook: the lemma of
+    every token is stemmed and stems that are stop words (ignoring case) or digits are
+    removed. Titles are streamed through nlp.pipe in batches, optionally over several
+    processes, with the dependency parser and the entity recognizer disabled. Stems of
+    lemmas are memoized (see token_cache). With a rule or lookup lemmatizer, whose
+    lemma only depends on the text, part of speech and morphology of a token, the
+    lemmatizer is taken out of nlp.pipe and lemmas are memoized by these three too.
+
+    Args:
+        model (string): Name of spaCy model
+        language (string): Language of NLTK stop words and of Snowball stemmer
+        custom_stop_words (iterable of string): Stop words besides the NLTK ones (lowercase)
+        n_process (int): Number of processes of nlp.pipe
+        batch_size (int): Number of titles of each nlp.pipe batch
+    """
+
+    def __init__(self, model=DEFAULT_MODEL, language='english', custom_stop_words=(),
+                 n_process=1, batch_size=DEFAULT_BATCH_SIZE):
+        self.nlp = spacy.load(model, disable=DISABLED_COMPONENTS)
+        lemmatizer = self.nlp.get_pipe('lemmatizer') if 'lemmatizer' in self.nlp.pipe_names else None
+        self.lemmatizer = lemmatizer if isinstance(lemmatizer, Lemmatizer) else None
+        self.lemma = None
+        if self.lemmatizer is not None:
+            self.lemma = TokenCache.from_environment('lemma:' + model, self._lemmatize,
+                                                     version_hash('lemma', model, self.nlp.meta['version'],
+                                                                  self.lemmatizer.mode, library_version('spacy')))
+        self.stop_words = frozenset(stopwords.words(language)) | frozenset(custom_stop_words)
+        self.stemmer = SnowballStemmer(language=language)
+        self.stem = TokenCache.from_environment('stem:' + language, self.stemmer.stem,
+                                                version_hash('stem', language, library_version('nltk')))
+        self.n_process = n_process
+        self.batch_size = batch_size
+
+    def _lemmatize(self, key):
+        text, pos, morph = key.rsplit('\t', 2)
+        doc = Doc(self.nlp.vocab, words=[text], spaces=[False], pos=[pos] if pos else None,
+                  morphs=[morph] if morph else None)
+        return self.lemmatizer(doc)[0].lemma_
+
+    def lemmas(self, doc):
+        """Gets the lemmas of a processed title (from the cached lemmatizer, if any)
+
+        Args:
+            doc (spacy.tokens.Doc): Processed title
+
+        Returns:
+            list of string: Lemma of each token
+        """
+
+        if self.lemma is None:
+            return [t.lemma_ for t in doc]
+        # Lemmas set before the lemmatizer (e.g. by the attribute ruler) are kept, as the lemmatizer does
+        return [t.lemma_ or self.lemma(f'{t.text}\t{t.pos_}\t{t.morph}') for t in doc]
+
+    def stems(self, doc):
+        """Gets the stems kept of a processed title
+
+        Args:
+            doc (spacy.tokens.Doc): Processed title
+
+        Returns:
+            list of string: Stems of lemmas, without stop words and digits
+        """
+
+        stem, stop_words = self.stem, self.stop_words
+        stem_list = [stem(lemma) for lemma in self.lemmas(doc)]
+        return [s for s in stem_list if s.lower() not in stop_words and not s.isdigit()]
+
+    def pipe(self, titles):
+        """Tokenizes titles in batches
+
+        Args:
+            titles (iterable of string): Titles
+
+        Returns:
+            generator of string: Stems of each title joined by spaces, in the same order
+        """
+
+        for doc in self.nlp.pipe(titles, n_process=self.n_process, batch_size=self.batch_size,
+                                 disable=self._cached_components()):
+            yield ' '.join(self.stems(doc))
+        self.stem.flush()
+        if self.lemma is not None:
+            self.lemma.flush()
+
+    def tokenize(self, title):
+        """Tokenizes a single title
+
+        Args:
+            title (string): Title
+
+        Returns:
+            string: Stems of title joined by spaces
+        """
+
+        return ' '.join(self.stems(self.nlp(title, disable=self._cached_components())))
+
+    def _cached_components(self):
+        return ['lemmatizer'] if self.lemma is not None else []
+
+def tokenize_titles(titles, **kwargs):
+    """Tokenizes all titles with a new BatchTokenizer
+
+    Args:
+        titles (list of string): Titles
+        kwargs: Arguments of BatchTokenizer
+
+    Returns:
+        list of string: Stems of each title joined by spaces
+    """
+
+    return list(BatchTokenizer(**kwargs).pipe(titles))